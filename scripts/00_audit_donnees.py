@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from ingestion import charger_classeurs_ponte, restaurer_types_mixtes
 
 def analyser_colonnes(df):
     """
@@ -104,15 +105,16 @@ def creer_tableau_notations_poules(notations_dict):
     df_notations = df_notations.sort_index()
     return df_notations
 
-def audit_transverse():
+def audit_transverse(classeurs=None):
     print("--- Démarrage de l'Audit Transverse des Données ---")
 
-    # 1. Chargement des données
-    print("\n[1/6] Chargement des fichiers Excel...")
+    # 1. Chargement des données (sauf si le runner de pipeline les fournit déjà)
+    print("\n[1/6] Chargement des fichiers Excel (via le cache Parquet)...")
     try:
-        df_2023 = pd.read_excel('data/raw/ponte_2023.xlsx')
-        df_2024 = pd.read_excel('data/raw/ponte_2024.xlsx')
-        df_2025 = pd.read_excel('data/raw/ponte_2025.xlsx')
+        if classeurs is None:
+            classeurs = charger_classeurs_ponte([2023, 2024, 2025])
+        # Colonnes mixtes (nombres et textes) remises dans leur type d'origine pour l'audit
+        df_2023, df_2024, df_2025 = [restaurer_types_mixtes(classeurs[a].copy()) for a in (2023, 2024, 2025)]
         
         # Nettoyage des dates
         df_2023['Date'] = pd.to_datetime(df_2023['Date'], format='%d/%m/%Y', errors='coerce')
@@ -180,4 +182,5 @@ def audit_transverse():
     print("✓ audit_notations_hors_poules.csv généré")
     print("\n--- Audit terminé avec succès ! ---")
 
-audit_transverse()
+if __name__ == "__main__":
+    audit_transverse()
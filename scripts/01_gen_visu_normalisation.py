@@ -2,26 +2,24 @@ import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+from stockage import chemin_table, lire_table
 
 # Configuration
 output_html = "output/step1_visualisation_normalisation.html"
 
 def load_data():
-    """Charge les fichiers df_1 depuis le dossier intermediaire."""
-    files = {
-        'meteo': 'data/intermediaire/df_1_meteo.csv',
-        'pontes': 'data/intermediaire/df_1_pontes.csv',
-        'commentaires': 'data/intermediaire/df_1_commentaires.csv',
-        'marans_indiv': 'data/intermediaire/df_1_marans_individuels.csv'
+    """Charge les tables df_1 (Parquet) et le CSV des Marans individuels."""
+    tables = {
+        'meteo': 'df_1_meteo',
+        'pontes': 'df_1_pontes',
+        'commentaires': 'df_1_commentaires',
     }
-    dfs = {}
-    for key, path in files.items():
-        if os.path.exists(path):
-            # Tous utilisent ';' comme séparateur d'après les aperçus
-            df = pd.read_csv(path, sep=';')
-            if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'])
-            dfs[key] = df
+    dfs = {key: lire_table(nom) for key, nom in tables.items() if os.path.exists(chemin_table(nom))}
+    path = 'data/intermediaire/df_1_marans_individuels.csv'
+    if os.path.exists(path):
+        df = pd.read_csv(path, sep=';')
+        df['Date'] = pd.to_datetime(df['Date'])
+        dfs['marans_indiv'] = df
     return dfs
 
 def create_structural_evolution_viz():
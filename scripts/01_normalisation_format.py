@@ -1,9 +1,10 @@
 import pandas as pd
+import importlib
+from ingestion import charger_classeurs_ponte
+from stockage import ecrire_table
 
-# Lecture des fichiers
-df_2023 = pd.read_excel('data/raw/ponte_2023.xlsx')
-df_2024 = pd.read_excel('data/raw/ponte_2024.xlsx')
-df_2025 = pd.read_excel('data/raw/ponte_2025.xlsx')
+# Le script d'audit commence par un chiffre : import via importlib
+comparer_structures = importlib.import_module('00_audit_donnees').comparer_structures
 
 # Renommer la colonne de température et la colonne pluie pour 
 # qu'elle soit cohérente avec les autres années ainsi que la colonne 3 Marans
@@ -15,11 +16,6 @@ def renommer_colonnes(df):
     df = df.rename(columns={'3 Marans': 'Marans'})
     return df
 
-# On applique la fonction renommer_colonnes à chaque dataframe
-df_2023 = renommer_colonnes(df_2023)
-df_2024 = renommer_colonnes(df_2024)
-df_2025 = renommer_colonnes(df_2025)
-
 # Rappel des noms des poules ou groupes de poules
 
 poules_2023 = ['Joséphine', 'Albertine', 'Augustine', 'Cunégonde', 'Pioupioute', 'Valérie', 'Rémiel', 'Saquiel']
@@ -27,27 +23,32 @@ poules_2024 = ['Joséphine', 'Albertine', 'Cunégonde', 'Valérie', 'Pioupioute'
 poules_2025 = ['Joséphine', 'Cunégonde', 'Valérie', 'Pioupioute', 'Rémiel', 'Marans']
 
 poules = set(poules_2023).union(set(poules_2024)).union(set(poules_2025))
-print(poules)
 
 # Définition des groupes de poules
 poules_individuelles_hors_marans = ['Joséphine', 'Augustine', 'Cunégonde', 'Valérie','Pioupioute', 'Rémiel', 'Saquiel']
 poules_marans_individuelles = ['Albertine', 'Tina', 'Nina']
 poules_marans_groupes = ['Marans', 'Nina et Tina']
 
-# Extraire les colonnes qui ne sont pas les poules
-autres_colonnes_2023 = df_2023.columns.difference(poules_2023)
-autres_colonnes_2024 = df_2024.columns.difference(poules_2024)
-autres_colonnes_2025 = df_2025.columns.difference(poules_2025)
-autres_colonnes = set(autres_colonnes_2023).intersection(set(autres_colonnes_2024)).intersection(set(autres_colonnes_2025))
-print(autres_colonnes)
-
-# Auditer de nouveau les colonnes et stocker dans le répertoire interim
-from step0_audit_donnees import comparer_structures
+# Groupes consolidés en une seule entité par date : {group_id: colonnes du groupe}
+GROUPES_A_CONSOLIDER = {
+    'MARANS': poules_marans_individuelles + poules_marans_groupes,
+}
 
-comp = comparer_structures(df_2023[autres_colonnes_2023], \
-df_2024[autres_colonnes_2024], \
-df_2025[autres_colonnes_2025])
-comp.to_csv('data/audit/audit_autres_colonnes.csv', index=False, encoding='utf-8-sig', sep=';')
+# Extraire les colonnes qui ne sont pas les poules
+# et les auditer de nouveau (stockage dans le répertoire audit)
+def auditer_autres_colonnes(df_2023, df_2024, df_2025, persister=True):
+    autres_colonnes_2023 = df_2023.columns.difference(poules_2023)
+    autres_colonnes_2024 = df_2024.columns.difference(poules_2024)
+    autres_colonnes_2025 = df_2025.columns.difference(poules_2025)
+    autres_colonnes = set(autres_colonnes_2023).intersection(set(autres_colonnes_2024)).intersection(set(autres_colonnes_2025))
+    print(autres_colonnes)
+
+    comp = comparer_structures(df_2023[autres_colonnes_2023], \
+    df_2024[autres_colonnes_2024], \
+    df_2025[autres_colonnes_2025])
+    if persister:
+        comp.to_csv('data/audit/audit_autres_colonnes.csv', index=False, encoding='utf-8-sig', sep=';')
+    return comp
 
 
 # Séparation des données en plusieurs dataframes :
@@ -90,24 +91,22 @@ def pivoter_et_concatener_poules(df_2023, df_2024, df_2025, poules):
     df_pontes = concat_poules([df_long_2023, df_long_2024, df_long_2025])
     return df_pontes
 
-df_pontes = pivoter_et_concatener_poules(df_2023, df_2024, df_2025, poules)
-df_pontes.sort_values(by='Date', inplace=True)
-
 # ===========================================================================
 # NOUVEAU : Regroupement simplifié des Marans dès le début
 # ===========================================================================
 
-def regrouper_marans_simplifie(df):
+def regrouper_marans_simplifie(df, persister=True, groupes=GROUPES_A_CONSOLIDER):
     """
     Regroupe toutes les poules Marans (Albertine, Nina, Tina, Nina et Tina, Marans)
     en un seul groupe 'MARANS' dès le début.
+    Tous les groupes de GROUPES_A_CONSOLIDER sont traités dans la même passe.
     
-    Gère l'effectif variable selon l'année :
-    - 2023 : effectif = 1 (Albertine seule)
-    - 2024 : effectif = 3 (Albertine + Nina + Tina)
-    - 2025 : effectif = 3 (puis 2 après décès)
+    L'effectif du groupe (variable selon les arrivées et décès) n'est pas
+    géré ici : il est lu dans le registre du poulailler
+    (data/raw/registre_poulailler.csv) par l'étape 2.
     
-    Sauvegarde les données individuelles dans un fichier séparé pour analyses futures.
+    Sauvegarde les données individuelles dans un fichier séparé pour analyses futures
+    (si persister est vrai).
     """
     df = df.copy()
     df['Date'] = pd.to_datetime(df['Date'])
@@ -115,46 +114,39 @@ def regrouper_marans_simplifie(df):
     # 1. Sauvegarder les données individuelles Marans + sous-groupe Nina et Tina
     poules_marans_a_conserver = ['Albertine', 'Nina', 'Tina', 'Nina et Tina']
     df_marans_individuels = df[df['Poule_brute'].isin(poules_marans_a_conserver)].copy()
-    df_marans_individuels.to_csv('data/intermediaire/df_1_marans_individuels.csv', index=False, encoding='utf-8-sig', sep=';')
-    print(f"✅ Données individuelles Marans sauvegardées : {len(df_marans_individuels)} lignes")
-    
-    # 2. Identifier et traiter les lignes Marans
-    marans_a_regrouper = ['Albertine', 'Nina', 'Tina', 'Nina et Tina', 'Marans']
+    if persister:
+        df_marans_individuels.to_csv('data/intermediaire/df_1_marans_individuels.csv', index=False, encoding='utf-8-sig', sep=';')
+        print(f"✅ Données individuelles Marans sauvegardées : {len(df_marans_individuels)} lignes")
     
-    # Séparer les données Marans et non-Marans
-    df_marans = df[df['Poule_brute'].isin(marans_a_regrouper)].copy()
-    df_autres = df[~df['Poule_brute'].isin(marans_a_regrouper)].copy()
+    # 2. Identifier les lignes à regrouper (tous les groupes configurés)
+    groupe_de_poule = {poule: groupe for groupe, membres in groupes.items() for poule in membres}
+    groupe = df['Poule_brute'].map(groupe_de_poule)
+    a_regrouper = groupe.notna()
+
+    # Séparer les données des groupes et des poules individuelles
+    df_groupes = df[a_regrouper].assign(group_id=groupe[a_regrouper])
+    df_autres = df[~a_regrouper].copy()
     
-    # 3. Pour chaque date, fusionner les lignes Marans en une seule
-    # On prend la première valeur non-NaN pour Ponte_brute
-    def fusionner_marans_par_date(group):
-        # Prendre la première valeur non-NaN
-        ponte_brute = group['Ponte_brute'].dropna().iloc[0] if not group['Ponte_brute'].dropna().empty else None
-        date = group.name  # Le nom du groupe est la Date
-        return pd.Series({
-            'Date': date,
-            'Poule_brute': 'MARANS',
-            'Ponte_brute': ponte_brute
-        })
-    
-    df_marans_fusionne = df_marans.groupby('Date', group_keys=False).apply(fusionner_marans_par_date, include_groups=False)
-    df_marans_fusionne = df_marans_fusionne.reset_index(drop=True)
+    # 3. Pour chaque groupe et chaque date, fusionner les lignes en une seule
+    # en une seule réduction : première valeur non-NaN de Ponte_brute
+    df_groupes_fusionne = (df_groupes.groupby(['group_id', 'Date'])['Ponte_brute']
+                           .first()
+                           .reset_index())
+    df_groupes_fusionne['Poule_brute'] = df_groupes_fusionne['group_id']
     
     # 4. Ajouter les colonnes niveau_observation et group_id
-    df_marans_fusionne['niveau_observation'] = 'groupe'
-    df_marans_fusionne['group_id'] = 'MARANS'
+    df_groupes_fusionne['niveau_observation'] = 'groupe'
+    df_groupes_fusionne = df_groupes_fusionne[['Date', 'Poule_brute', 'Ponte_brute', 'niveau_observation', 'group_id']]
     
     df_autres['niveau_observation'] = 'individuel'
     df_autres['group_id'] = None
     
     # 5. Recombiner les dataframes
-    df_final = pd.concat([df_autres, df_marans_fusionne], axis=0)
+    df_final = pd.concat([df_autres, df_groupes_fusionne], axis=0)
     df_final = df_final.sort_values(by='Date').reset_index(drop=True)
     
     return df_final
 
-df_pontes = regrouper_marans_simplifie(df_pontes)
-
 
 # Premiers choix de conservation de certaines colonnes 
 # On conserve les colonnes communes aux 3 années ainsi que la colonne Humidité
@@ -179,33 +171,68 @@ def selectionner_colonnes_commentaires(df):
     existantes = [col for col in colonnes_commentaires if col in df.columns]
     return df[existantes]
 
-# Application
-df_meteo_2023 = selectionner_colonnes_meteo(df_2023)
-df_meteo_2024 = selectionner_colonnes_meteo(df_2024)
-df_meteo_2025 = selectionner_colonnes_meteo(df_2025)
+# ===========================================================================
+# EXECUTION DE L'ETAPE
+# ===========================================================================
+
+def normalisation_format(classeurs, persister=True):
+    """
+    Étape 1 : à partir des classeurs bruts {année: DataFrame}, retourne
+    (df_pontes, df_meteo, df_commentaires).
+    Les fichiers df_1_*.csv ne sont écrits que si persister est vrai.
+    """
+    # On applique la fonction renommer_colonnes à chaque dataframe
+    df_2023 = renommer_colonnes(classeurs[2023])
+    df_2024 = renommer_colonnes(classeurs[2024])
+    df_2025 = renommer_colonnes(classeurs[2025])
+    print(poules)
+
+    auditer_autres_colonnes(df_2023, df_2024, df_2025, persister=persister)
+
+    df_pontes = pivoter_et_concatener_poules(df_2023, df_2024, df_2025, poules)
+    df_pontes.sort_values(by='Date', inplace=True)
+    df_pontes = regrouper_marans_simplifie(df_pontes, persister=persister)
+
+    # Application
+    df_meteo_2023 = selectionner_colonnes_meteo(df_2023)
+    df_meteo_2024 = selectionner_colonnes_meteo(df_2024)
+    df_meteo_2025 = selectionner_colonnes_meteo(df_2025)
 
-print("\nColonnes conservées pour la météo 2023 :", df_meteo_2023.columns.tolist())
-print("\nColonnes conservées pour la météo 2024 :", df_meteo_2024.columns.tolist())
-print("\nColonnes conservées pour la météo 2025 :", df_meteo_2025.columns.tolist())
+    print("\nColonnes conservées pour la météo 2023 :", df_meteo_2023.columns.tolist())
+    print("\nColonnes conservées pour la météo 2024 :", df_meteo_2024.columns.tolist())
+    print("\nColonnes conservées pour la météo 2025 :", df_meteo_2025.columns.tolist())
 
     # On concatène les df_meteo en un seul dataframe
-df_meteo = pd.concat([df_meteo_2023, df_meteo_2024, df_meteo_2025], axis=0)
-df_meteo.sort_values(by='Date', inplace=True)
-
-df_commentaires_2023 = selectionner_colonnes_commentaires(df_2023)
-df_commentaires_2024 = selectionner_colonnes_commentaires(df_2024)
-df_commentaires_2025 = selectionner_colonnes_commentaires(df_2025)
-
-# On concatène les df_commentaires en un seul dataframe
-df_commentaires = pd.concat([df_commentaires_2023, df_commentaires_2024, df_commentaires_2025], axis=0)
-df_commentaires.sort_values(by='Date', inplace=True)
-
-# On sauvegarde les df_pontes et df_meteo dans le répertoire intermediaire
-df_pontes.to_csv('data/intermediaire/df_1_pontes.csv', index=False, encoding='utf-8-sig', sep=';')
-df_meteo.to_csv('data/intermediaire/df_1_meteo.csv', index=False, encoding='utf-8-sig', sep=';')
-df_commentaires.to_csv('data/intermediaire/df_1_commentaires.csv', index=False, encoding='utf-8-sig', sep=';')
-
-print(f"\n✅ Fichiers sauvegardés :")
-print(f"  - df_1_pontes.csv : {len(df_pontes)} lignes")
-print(f"  - df_1_meteo.csv : {len(df_meteo)} lignes")
-print(f"  - df_1_commentaires.csv : {len(df_commentaires)} lignes")
+    df_meteo = pd.concat([df_meteo_2023, df_meteo_2024, df_meteo_2025], axis=0)
+    df_meteo.sort_values(by='Date', inplace=True)
+    df_meteo.reset_index(drop=True, inplace=True)
+
+    df_commentaires_2023 = selectionner_colonnes_commentaires(df_2023)
+    df_commentaires_2024 = selectionner_colonnes_commentaires(df_2024)
+    df_commentaires_2025 = selectionner_colonnes_commentaires(df_2025)
+
+    # On concatène les df_commentaires en un seul dataframe
+    df_commentaires = pd.concat([df_commentaires_2023, df_commentaires_2024, df_commentaires_2025], axis=0)
+    df_commentaires.sort_values(by='Date', inplace=True)
+    df_commentaires.reset_index(drop=True, inplace=True)
+
+    if persister:
+        # On sauvegarde les df_pontes et df_meteo dans le répertoire intermediaire
+        df_pontes.to_csv('data/intermediaire/df_1_pontes.csv', index=False, encoding='utf-8-sig', sep=';')
+        df_meteo.to_csv('data/intermediaire/df_1_meteo.csv', index=False, encoding='utf-8-sig', sep=';')
+        df_commentaires.to_csv('data/intermediaire/df_1_commentaires.csv', index=False, encoding='utf-8-sig', sep=';')
+        ecrire_table(df_pontes, 'df_1_pontes')
+        ecrire_table(df_meteo, 'df_1_meteo')
+        ecrire_table(df_commentaires, 'df_1_commentaires')
+
+        print(f"\n✅ Fichiers sauvegardés :")
+        print(f"  - df_1_pontes.csv : {len(df_pontes)} lignes")
+        print(f"  - df_1_meteo.csv : {len(df_meteo)} lignes")
+        print(f"  - df_1_commentaires.csv : {len(df_commentaires)} lignes")
+
+    return df_pontes, df_meteo, df_commentaires
+
+
+if __name__ == "__main__":
+    # Lecture des fichiers (via le cache Parquet, re-parsing Excel seulement si le classeur a changé)
+    normalisation_format(charger_classeurs_ponte([2023, 2024, 2025]))
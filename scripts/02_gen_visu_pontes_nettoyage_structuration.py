@@ -1,21 +1,19 @@
 import pandas as pd
 import plotly.graph_objects as go
 import os
+from stockage import chemin_table, lire_table
 
 # Configuration
 output_html = "output/step2_visualisation_nettoyage_structuration.html"
 
 def load_data():
     """Charge les données avant et après traitement."""
-    df1_path = 'data/intermediaire/df_1_pontes.csv'
-    df2_path = 'data/intermediaire/df_2_pontes.csv'
-    
     data = {}
-    if os.path.exists(df1_path): 
-        data['df1'] = pd.read_csv(df1_path, sep=';')
+    if os.path.exists(chemin_table('df_1_pontes')):
+        data['df1'] = lire_table('df_1_pontes')
         
-    if os.path.exists(df2_path): 
-        df2 = pd.read_csv(df2_path, sep=';')
+    if os.path.exists(chemin_table('df_2_pontes')):
+        df2 = lire_table('df_2_pontes')
         data['df2'] = df2
         
         # Dérivation des sous-ensembles
@@ -86,7 +84,8 @@ def create_categorical_distribution_viz(df, column, title, color):
         return None
     
     # Nettoyage pour les remarques (on enlève les vides)
-    dist = df[df[column].notna() & (df[column] != '') & (df[column] != 'RAS')]
+    # (en chaînes : une colonne catégorielle compterait aussi ses catégories exclues)
+    dist = df[df[column].notna() & (df[column] != '') & (df[column] != 'RAS')].astype({column: str})
     if column == 'Remarques':
         # On peut avoir beaucoup de remarques uniques, on prend les plus fréquentes
         dist = dist[column].value_counts().head(15).reset_index()
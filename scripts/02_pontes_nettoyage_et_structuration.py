@@ -1,6 +1,9 @@
 import pandas as pd
 import re
 import numpy as np
+from registre import (charger_registre, effectif_a_date, cumul_variations,
+                      variations_effectif, EVENEMENTS_THEORIQUES, EVENEMENTS_REELS)
+from stockage import ecrire_table, lire_table
 
 # ===========================================================================
 # FONCTIONS DE TRAITEMENT DES PONTES
@@ -75,6 +78,69 @@ def traiter_ponte_individuelle(row):
     return pd.Series(resultat)
 
 
+def traiter_pontes_individuelles_vectorise(ponte_brute):
+    """
+    Version vectorisée de traiter_ponte_individuelle : traite toute une colonne
+    Ponte_brute en une passe avec les accesseurs .str de pandas.
+    Retourne un DataFrame (même index) avec Ponte, Etat_oeuf, Doute, Effectif, Remarques,
+    identique à l'application ligne à ligne.
+    """
+    val = ponte_brute.astype('str').fillna('').str.strip().str.replace('\xa0', '', regex=False)
+    val_lower = val.str.lower()
+
+    # Cas NaN ou vide : valeurs par défaut
+    renseigne = ponte_brute.notna() & ~val.isin(['nan', '', 'None'])
+
+    # Gestion du Doute et de la Mue
+    doute = renseigne & val_lower.str.contains('?', regex=False)
+    mue = renseigne & (val_lower.str.contains('mue', regex=False)
+                       | val_lower.str.contains('(m)', regex=False)
+                       | val_lower.str.contains(' m', regex=False))
+    remarques = pd.Series(np.where(mue, 'Mue', ''), index=ponte_brute.index, dtype=object)
+
+    # Gestion du Décès : on s'arrête là pour ces lignes
+    dcd = renseigne & val_lower.str.contains('dcd', regex=False)
+    reste = renseigne & ~dcd
+
+    ponte = pd.Series(0, index=ponte_brute.index, dtype='int64')
+    etat = pd.Series('RAS', index=ponte_brute.index, dtype=object)
+
+    # Cas 1: Valeurs numériques avec annotations n(+m)
+    n_plus_m = val.str.extract(r'^(\d+)\(\+(\d+)\)$')
+    cas_1 = reste & n_plus_m[0].notna()
+    ponte[cas_1] = n_plus_m.loc[cas_1, 0].astype(int) + n_plus_m.loc[cas_1, 1].astype(int)
+    remarques[cas_1] = n_plus_m.loc[cas_1, 1].astype(int).astype(str) + " oeufs trouvés dehors"
+    reste &= ~cas_1
+
+    # Cas 2: Valeurs avec 'x' (compter les x ; état cassé ou mot entre parenthèses)
+    cas_2 = reste & val_lower.str.contains('x', regex=False)
+    ponte[cas_2] = val_lower[cas_2].str.count('x')
+    casse = cas_2 & val_lower.str.contains('c', regex=False)
+    parentheses = (cas_2 & ~casse
+                   & val_lower.str.contains('(', regex=False)
+                   & val_lower.str.contains(')', regex=False))
+    etat[casse] = 'cassé'
+    etat[parentheses] = val_lower[parentheses].str.extract(r'\(([^()]*)', expand=False)
+    reste &= ~cas_2
+
+    # Cas 3: Valeurs numériques pures
+    cas_3 = reste & val.str.isdigit()
+    ponte[cas_3] = val[cas_3].astype(int)
+    reste &= ~cas_3
+
+    # Cas 4: Autres textes (remarques par défaut)
+    cas_4 = reste & (remarques == '')
+    remarques[cas_4] = val[cas_4]
+
+    return pd.DataFrame({
+        'Ponte': ponte,
+        'Etat_oeuf': etat,
+        'Doute': doute.astype(bool),
+        'Effectif': np.where(dcd, 0, 1),
+        'Remarques': remarques,
+    }, index=ponte_brute.index)
+
+
 # ===========================================================================
 # TRAITEMENT DES PONTES GROUPE (MARANS UNIQUEMENT)
 # ===========================================================================
@@ -163,116 +229,175 @@ def traiter_ponte_groupe_marans(row):
     return pd.Series(resultat)
 
 
+# ===========================================================================
+# MÉMOÏSATION PAR NOTATION UNIQUE
+# ===========================================================================
+
+def traiter_par_notation_unique(df, fonction, cles):
+    """
+    Applique une fonction de traitement ligne à ligne (traiter_ponte_individuelle,
+    traiter_ponte_groupe_marans) une seule fois par combinaison distincte des
+    colonnes cles, puis diffuse les résultats sur toutes les lignes via les codes entiers.
+    Le coût dépend du nombre de notations distinctes, pas du nombre de lignes.
+    """
+    if df.empty:
+        return df.apply(fonction, axis=1)
+    codes = df.groupby(cles, dropna=False, sort=False).ngroup().to_numpy()
+    _, premieres = np.unique(codes, return_index=True)
+    res_uniques = df.iloc[premieres][cles].apply(fonction, axis=1)
+    res = res_uniques.iloc[codes]
+    res.index = df.index
+    return res
+
+
+# ===========================================================================
+# PROPAGATION DU DÉCÈS ET DES EFFECTIFS (VECTORISÉE)
+# ===========================================================================
+
+def propager_deces_et_effectifs(df, registre):
+    """
+    Propage les décès sur l'ensemble du DataFrame en une passe :
+    - poule individuelle : Effectif et Ponte à 0 à partir du premier 'dcd' ;
+    - groupe (MARANS) : traiter_ponte_groupe_marans a posé Effectif = Effectif_theo - 1
+      sur la ligne du décès ; cet effectif réduit est propagé jusqu'à la fin,
+      augmenté des arrivées/départs du registre survenus après le décès
+      (Mouette : 2 + 1 = 3, pas 4).
+    L'ordre des lignes en entrée est conservé.
+    """
+    index_origine = df.index
+    df = df.sort_values(['Poule_brute', 'Date'], kind='mergesort').copy()
+    poule = df['Poule_brute']
+    individuel = df['niveau_observation'] == 'individuel'
+
+    # Drapeau de décès puis maximum cumulé par poule : vrai à partir du premier décès
+    deces = (individuel & (df['Effectif'] == 0)) | (~individuel & (df['Effectif'] < df['Effectif_theo']))
+    apres_deces = deces.groupby(poule).cummax()
+
+    # Poules individuelles
+    df.loc[individuel & apres_deces, ['Effectif', 'Ponte']] = 0
+
+    # Groupes : effectif au premier décès + arrivées postérieures au décès
+    deces_groupe = deces & ~individuel
+    if deces_groupe.any():
+        arrivees = cumul_variations(variations_effectif(registre, EVENEMENTS_THEORIQUES),
+                                    df['Poule_brute'], df['Date'])
+        effectif_deces = df['Effectif'].where(deces_groupe).groupby(poule).transform('first')
+        arrivees_au_deces = arrivees.where(deces_groupe).groupby(poule).transform('first')
+        mask = ~individuel & apres_deces
+        df.loc[mask, 'Effectif'] = (effectif_deces + arrivees - arrivees_au_deces)[mask].astype(int)
+    return df.loc[index_origine]
+
+
+def verifier_effectif_reel(df, registre):
+    """
+    Compare l'effectif déduit des notations (décès propagés) à l'effectif réel
+    du registre (arrivées, départs et décès). Un écart signale un décès noté
+    dans les relevés mais absent du registre, ou l'inverse.
+    Retourne les lignes en écart (Date, Poule_brute, Effectif, Effectif_reel).
+    """
+    effectif_reel = effectif_a_date(registre, df['Poule_brute'], df['Date'], EVENEMENTS_REELS)
+    ecart = df['Effectif'] != effectif_reel
+    ecarts = df.loc[ecart, ['Date', 'Poule_brute', 'Effectif']].assign(Effectif_reel=effectif_reel[ecart])
+    if len(ecarts):
+        print(f"⚠️  {len(ecarts)} relevés dont l'effectif diffère du registre :")
+        print(ecarts.groupby('Poule_brute')['Date'].agg(['min', 'max', 'count']))
+    else:
+        print("✅ Effectifs cohérents avec le registre (décès compris)")
+    return ecarts
+
+
 # ===========================================================================
 # EXECUTION DU SCRIPT
 # ===========================================================================
 
-def nettoyage_completion_et_structuration():
-    try:
-        # 1. Chargement des données brute au format long
-        df_long = pd.read_csv('data/intermediaire/df_1_pontes.csv', sep=';')
-        print(f"✅ Chargement de {len(df_long)} lignes de pontes.")
+def structurer_pontes(df_long, persister=True, mode='vectorise', registre=None):
+    """
+    Étape 2 : à partir des pontes brutes au format long (df_1_pontes),
+    retourne les pontes structurées (Ponte, Effectif, Etat_oeuf, Doute, Remarques).
+    mode :
+    - 'vectorise' (par défaut) : poules individuelles en vectorisé, groupe MARANS
+      traité une fois par notation distincte ;
+    - 'unique' : les deux traitements ligne à ligne, une fois par notation distincte ;
+    - 'ligne' : apply sur chaque ligne (historique).
+    registre : journal des événements du poulailler (chargé depuis
+    data/raw/registre_poulailler.csv s'il n'est pas fourni).
+    Le fichier df_2_pontes.csv n'est écrit que si persister est vrai.
+    """
+    df_long = df_long.reset_index(drop=True)
 
-        # 2. Préparation des masques pour le traitement
-        # L'étape 1 a déjà normalisé niveau_observation (individuel, groupe)
-        # et group_id (MARANS).
-        
-        # On s'assure que les valeurs manquantes sont gérées
-        df_long['niveau_observation'] = df_long['niveau_observation'].fillna('individuel')
-        
-        # Convertir Date en datetime pour extraire l'année
-        df_long['Date'] = pd.to_datetime(df_long['Date'])
-        
-        # Pré-remplissage de l'effectif théorique (utilisé par les fonctions de traitement)
-        df_long['Effectif_theo'] = 1
-        
-        # Pour MARANS, l'effectif varie selon l'année :
-        # - 2023 : 1 (Albertine seule)
-        # - 2024 : 3 (Albertine + Nina + Tina)
-        # - 2025 : 3 poules de 2023/2024 + Mouette à partir du 4/12/2025 : Effectif_Theo  = 4 à partir du 4/12/2025
-        # - 2025 : 3 puis 2 après décès, géré par la propagation; puis 3 après arrivée de Mouette : 
+    # 2. Préparation des masques pour le traitement
+    # L'étape 1 a déjà normalisé niveau_observation (individuel, groupe)
+    # et group_id (MARANS).
     
-        mask_marans = df_long['Poule_brute'] == 'MARANS'
-        df_long.loc[mask_marans & (df_long['Date'].dt.year == 2023), 'Effectif_theo'] = 1
-        df_long.loc[mask_marans & (df_long['Date'].dt.year == 2024), 'Effectif_theo'] = 3
-        df_long.loc[mask_marans & (df_long['Date'].dt.year == 2025), 'Effectif_theo'] = 3
-        df_long.loc[mask_marans & (df_long['Date'] >= '2025-12-04'), 'Effectif_theo'] = 4
-        
-        mask_individuel = df_long['niveau_observation'] == 'individuel'
-        mask_groupe = df_long['niveau_observation'] == 'groupe'
+    # On s'assure que les valeurs manquantes sont gérées
+    df_long['niveau_observation'] = df_long['niveau_observation'].fillna('individuel')
+    
+    # Convertir Date en datetime pour extraire l'année
+    df_long['Date'] = pd.to_datetime(df_long['Date'])
     
-        # 3. Application des traitements
-        print("🔄 Traitement des données individuelles...")
+    # Effectif théorique (utilisé par les fonctions de traitement) lu dans le registre
+    # du poulailler : arrivées et départs, les décès étant détectés dans les notations.
+    # Pour MARANS : 1 en 2023 (Albertine), 3 en 2024-2025 (+ Nina, Tina),
+    # 4 à partir de l'arrivée de Mouette le 04/12/2025.
+    if registre is None:
+        registre = charger_registre()
+    df_long['Effectif_theo'] = effectif_a_date(registre, df_long['Poule_brute'], df_long['Date'])
+    
+    mask_individuel = df_long['niveau_observation'] == 'individuel'
+    mask_groupe = df_long['niveau_observation'] == 'groupe'
+
+    # 3. Application des traitements
+    print("🔄 Traitement des données individuelles...")
+    if mode == 'ligne':
         res_indiv = df_long[mask_individuel].apply(traiter_ponte_individuelle, axis=1)
-        
-        print("🔄 Traitement des données groupe MARANS...")
+    elif mode == 'unique':
+        res_indiv = traiter_par_notation_unique(df_long[mask_individuel], traiter_ponte_individuelle, ['Ponte_brute'])
+    else:
+        res_indiv = traiter_pontes_individuelles_vectorise(df_long.loc[mask_individuel, 'Ponte_brute'])
+    
+    print("🔄 Traitement des données groupe MARANS...")
+    if mode == 'ligne':
         res_groupe = df_long[mask_groupe].apply(traiter_ponte_groupe_marans, axis=1)
-        
-        # 4. Fusion des résultats avec le DataFrame original
-        df_result = pd.concat([
-            pd.concat([df_long[mask_individuel], res_indiv], axis=1),
-            pd.concat([df_long[mask_groupe], res_groupe], axis=1)
-        ]).sort_index()
-
-        # 5. Post-traitement : Propagation du décès / effectif
-        print("🔄 Post-traitement : Propagation du décès et des effectifs...")
-        MOUETTE_DATE = pd.Timestamp('2025-12-04')
-
-        def propager_status(group):
-            # Le nom du groupe (Poule_brute) est accessible via l'attribut .name
-            poule = group.name
-            group = group.sort_values('Date').copy()
-            
-            if group['niveau_observation'].iloc[0] == 'individuel':
-                deces = group['Effectif'] == 0
-                if deces.any():
-                    premier_deces_pos = np.where(deces)[0][0]
-                    group.iloc[premier_deces_pos:, group.columns.get_loc('Effectif')] = 0
-                    group.iloc[premier_deces_pos:, group.columns.get_loc('Ponte')] = 0
-            else:
-                # Pour le groupe MARANS :
-                # - traiter_ponte_groupe_marans a déjà posé Effectif = Effectif_theo - 1
-                #   sur la ligne du décès.
-                # - Ici on propage cet effectif réduit jusqu'à l'arrivée de Mouette,
-                #   puis on ré-applique l'Effectif_theo à partir du 04/12/2025.
-                if poule == 'MARANS':
-                    effectif_col = group.columns.get_loc('Effectif')
-                    effectif_theo_col = group.columns.get_loc('Effectif_theo')
-
-                    # Détecte les lignes où un décès a eu lieu :
-                    # la fonction de traitement a posé Effectif = Effectif_theo - 1
-                    deces = group['Effectif'] < group['Effectif_theo']
-                    if deces.any():
-                        premier_deces_pos = np.where(deces)[0][0]
-                        effectif_apres_deces = int(group.iloc[premier_deces_pos, effectif_col])
-
-                        # Propager l'effectif réduit jusqu'à la fin
-                        group.iloc[premier_deces_pos:, effectif_col] = effectif_apres_deces
-
-                        # À l'arrivée de Mouette (04/12/2025) : +1 sur l'effectif courant
-                        # (pas Effectif_theo car un décès a eu lieu → 2+1=3, pas 4)
-                        mask_mouette = group['Date'] >= MOUETTE_DATE
-                        if mask_mouette.any():
-                            group.loc[mask_mouette, 'Effectif'] = effectif_apres_deces + 1
-            
-            # On ré-ajoute la colonne Poule_brute car include_groups=False l'exclut du traitement
-            group['Poule_brute'] = poule
-            return group
-
-        df_result = df_result.groupby('Poule_brute', group_keys=False).apply(propager_status, include_groups=False)
-
-        # Nettoyage colonne temporaire Effectif_theo (utilisée pour la propagation)
-        if 'Effectif_theo' in df_result.columns:
-            df_result = df_result.drop(columns=['Effectif_theo'])
-
-        # 6. Sauvegarde du résultat structuré final
-        # Mettre dans l'ordre les colonnes
-        df_result = df_result[['Date', 'Poule_brute', 'Ponte_brute', 'Ponte', 'Effectif', 'Etat_oeuf', 'Doute', 'Remarques', 'niveau_observation', 'group_id']]
-     
+    else:
+        # L'effectif théorique fait partie de la clé : il entre dans le calcul de l'Effectif
+        res_groupe = traiter_par_notation_unique(df_long[mask_groupe], traiter_ponte_groupe_marans,
+                                                 ['Ponte_brute', 'Effectif_theo'])
+    
+    # 4. Fusion des résultats avec le DataFrame original
+    df_result = pd.concat([
+        pd.concat([df_long[mask_individuel], res_indiv], axis=1),
+        pd.concat([df_long[mask_groupe], res_groupe], axis=1)
+    ]).sort_index()
+
+    # 5. Post-traitement : Propagation du décès / effectif
+    print("🔄 Post-traitement : Propagation du décès et des effectifs...")
+    df_result = propager_deces_et_effectifs(df_result, registre)
+    verifier_effectif_reel(df_result, registre)
+
+    # Nettoyage colonne temporaire Effectif_theo (utilisée pour la propagation)
+    if 'Effectif_theo' in df_result.columns:
+        df_result = df_result.drop(columns=['Effectif_theo'])
+
+    # 6. Mettre dans l'ordre les colonnes
+    df_result = df_result[['Date', 'Poule_brute', 'Ponte_brute', 'Ponte', 'Effectif', 'Etat_oeuf', 'Doute', 'Remarques', 'niveau_observation', 'group_id']]
+ 
+    if persister:
         output_final = 'data/intermediaire/df_2_pontes.csv'
         df_result.to_csv(output_final, sep=';', index=False)
-        
+        ecrire_table(df_result, 'df_2_pontes')
         print(f"✅ Traitement terminé. Fichier sauvegardé : {output_final}")
+
+    return df_result
+
+
+def nettoyage_completion_et_structuration():
+    try:
+        # 1. Chargement des données brute au format long
+        df_long = lire_table('df_1_pontes')
+        print(f"✅ Chargement de {len(df_long)} lignes de pontes.")
+
+        # 2. à 6. Traitement et sauvegarde
+        df_result = structurer_pontes(df_long)
         
         # Aperçu
         print("\nAperçu des 15 premières lignes traitées :")
@@ -289,4 +414,5 @@ def nettoyage_completion_et_structuration():
         print(f"❌ Une erreur est survenue : {e}")
         traceback.print_exc()
 
-nettoyage_completion_et_structuration()
+if __name__ == "__main__":
+    nettoyage_completion_et_structuration()
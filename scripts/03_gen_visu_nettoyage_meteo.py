@@ -2,15 +2,12 @@ import pandas as pd
 import datetime as dt
 import plotly.graph_objects as go
 import os
+from stockage import lire_table
 
 def generate_visualization():
     # 1. Charger les données
-    df1 = pd.read_csv('data/intermediaire/df_1_meteo.csv', sep=';')
-    df2 = pd.read_csv('data/intermediaire/df_2_meteo.csv', sep=';')
-    
-    # S'assurer que les dates sont au bon format pour la comparaison
-    df1['Date'] = pd.to_datetime(df1['Date'])
-    df2['Date'] = pd.to_datetime(df2['Date'])
+    df1 = lire_table('df_1_meteo')
+    df2 = lire_table('df_2_meteo')
     
     # 2. Calculer les statistiques
     total_rows = len(df1)
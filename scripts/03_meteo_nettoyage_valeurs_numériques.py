@@ -1,8 +1,12 @@
 import pandas as pd
+import numpy as np
 import datetime as dt
+import argparse
+from ingestion import agreger_histo_meteo_journalier
+from stockage import ecrire_table, lire_table
 
 def charger_donnees():
-    df_meteo = pd.read_csv('data/intermediaire/df_1_meteo.csv', sep=';')
+    df_meteo = lire_table('df_1_meteo')
     return df_meteo
 
 
@@ -12,70 +16,171 @@ def audit_meteo(df_meteo):
     print(df_meteo.describe())
     print(df_meteo.isnull().sum())
 
-audit_meteo(charger_donnees())
-
 # On remarque que la colonne 'Météo' a des valeurs manquantes et des valeurs multiples (ex: 'beau/couvert').
 # Les valeurs manquantes seront remplacées par 'inconnue'
 # Les valeurs multiples feront l'objet d'un traitement spécifique
 # On remarque que la colonne 'Pluie(mm)' a des valeurs manquantes : elles seront remplacées
 # par zéro
 # On remarque que la colonne 'T°C (12h-15h)' a des valeurs manquantes : ici on remplacera
-# les valeurs manquantes par la moyenne des valeurs de la date précédente avec valeurs valides et la date suivante 
-# avec valeurs valides  
+# les valeurs manquantes par interpolation entre la date précédente avec valeur valide et la date suivante 
+# avec valeur valide  
 # On remarque que la colonne 'Humidité' a des valeurs manquantes : ici on remplacera
-# les valeurs manquantes par la moyenne des valeurs de la date précédente avec valeurs valides et la date suivante 
-# avec valeurs valides pour les années 2024 et 2025 car en 2023 il n'y a pas de donnée
+# les valeurs manquantes de la même manière pour les années 2024 et 2025 car en 2023 il n'y a pas de donnée
 
 def traitement_pluie(df_meteo):
+    source = df_meteo.get('Pluie(mm)_source', pd.Series('mesure', index=df_meteo.index))
+    df_meteo['Pluie(mm)_source'] = source.where(df_meteo['Pluie(mm)'].notna(), 'zero')
     df_meteo['Pluie(mm)'] = df_meteo['Pluie(mm)'].fillna(0)
     return df_meteo
 
-def traitement_temperature(df_meteo):
-    # On crée une fonction pour remplacer les valeurs manquantes par la moyenne des valeurs de la date précédente avec valeurs valides et la date suivante 
-    # avec valeurs valides. 
-    # On crée une nouvelle colonne pour stocker les valeurs traitées : 'T°C (12h-15h)_traite'
-    df_meteo['T°C (12h-15h)_traite'] = df_meteo['T°C (12h-15h)']
-    for i in range(len(df_meteo)):
-        if pd.isna(df_meteo.loc[i, 'T°C (12h-15h)']):
-            df_meteo.loc[i, 'T°C (12h-15h)_traite'] = float(df_meteo.loc[i-1, 'T°C (12h-15h)'] + df_meteo.loc[i+1, 'T°C (12h-15h)'])/2
+# ===========================================================================
+# COMBLEMENT PAR LA STATION MÉTÉO (Histo_Meteo.xlsx)
+# ===========================================================================
+# Les relevés horaires de la station sont lus en flux et agrégés par jour en une
+# seule passe (agreger_histo_meteo_journalier) : moyenne des relevés de 12h00 à
+# 15h00 pour la température et l'humidité ; pour la pluie, cumul des 24 relevés
+# horaires de 8h la veille à 7h le jour même, comme le relevé manuel fait à 8h.
+# Les trous du relevé manuel sont ensuite comblés par une simple jointure sur la
+# date (source 'station').
+# Ce mode est optionnel (python scripts/03_... --station, ou --station dans
+# pipeline.py) : par défaut, seuls l'interpolation et le zéro de pluie s'appliquent.
+
+FICHIER_HISTO = 'data/raw/Histo_Meteo.xlsx'
+FEUILLE_HISTO = 'Histo_Meteo'
+FENETRE_HEURES = (12, 15)
+
+# Le relevé de pluie du jour J est fait à 8h : il couvre les 24 heures précédentes
+DECALAGE_PLUIE_HEURES = 16
+
+# colonne du relevé manuel : (colonne station, fonction, fenêtre horaire, décalage en heures, facteur)
+AGREGATS_STATION = {
+    'T°C (12h-15h)': ('Temp_C',       'mean', FENETRE_HEURES, 0,                     1),
+    'Humidité':      ('Humidite_pct', 'mean', FENETRE_HEURES, 0,                     0.01),
+    'Pluie(mm)':     ('Pluie_mm',     'sum',  None,           DECALAGE_PLUIE_HEURES, 1),
+}
+
+
+def charger_station_journalier(chemin=FICHIER_HISTO, agregats=AGREGATS_STATION):
+    """
+    Retourne les agrégats journaliers de la station (index Date, mêmes noms de
+    colonnes que df_1_meteo). Un jour sans relevé donne NaN, pas 0.
+    """
+    definitions = {}
+    for colonne, (source, fonction, heures, decalage, _) in agregats.items():
+        definitions[colonne] = (source, fonction, heures, decalage)
+        definitions[f'{colonne}_nb'] = (source, 'count', heures, decalage)
+    df_jour, _, _, _ = agreger_histo_meteo_journalier(chemin, sheet_name=FEUILLE_HISTO, agregats=definitions)
+    df_jour = df_jour.set_index('Date').asfreq('D')
+
+    for colonne, (_, _, _, _, facteur) in agregats.items():
+        valeurs = df_jour[colonne].where(df_jour[f'{colonne}_nb'] > 0)
+        df_jour[colonne] = (valeurs * facteur).round(2)
+    return df_jour[list(agregats)]
+
+
+def combler_par_station(df_meteo, df_station):
+    """
+    Remplace les valeurs manquantes par celles de la station pour le même jour
+    et renseigne '<colonne>_source' ('mesure' ou 'station').
+    """
+    df_station = df_station.reindex(pd.DatetimeIndex(df_meteo['Date']))
+    for colonne in df_station.columns:
+        valeurs_station = df_station[colonne].to_numpy()
+        comblable = df_meteo[colonne].isna() & pd.notna(valeurs_station)
+        df_meteo[f'{colonne}_source'] = np.where(comblable, 'station', 'mesure')
+        df_meteo[colonne] = df_meteo[colonne].mask(comblable, valeurs_station)
     return df_meteo
 
-def traitement_humidite(df_meteo):
-    # On crée une fonction pour remplacer les valeurs manquantes par la moyenne des valeurs de la date précédente avec valeurs valides et la date suivante 
-    # avec valeurs valides  
-    # On crée une nouvelle colonne pour stocker les valeurs traitées : 'Humidité_traite'
-    # Attention, il faut tester l'année !
-    df_meteo['Humidité_traite'] = df_meteo['Humidité']
-    df_meteo['Date'] = pd.to_datetime(df_meteo['Date'])
-    if df_meteo['Date'].dt.year.isin([2024, 2025]).any():
-        # On récupère les valeurs manquantes hors 2023
-        mask = df_meteo['Humidité'].isna()
-        # On calcule la moyenne des valeurs de la date précédente avec valeurs valides et la date suivante 
-        # avec valeurs valides
-        avg_values = (df_meteo['Humidité'].shift(1) + df_meteo['Humidité'].shift(-1)) / 2
-        # On remplace les valeurs manquantes par la moyenne des valeurs de la date précédente avec valeurs valides et la date suivante 
-        # avec valeurs valides
-        df_meteo.loc[mask, 'Humidité_traite'] = avg_values[mask]
-    return df_meteo
 
+# ===========================================================================
+# IMPUTATION DES VALEURS MANQUANTES (TEMPÉRATURE, HUMIDITÉ)
+# ===========================================================================
+# Interpolation linéaire dans le temps entre les relevés valides les plus proches.
+# Seuls les trous d'au plus MAX_TROU_JOURS jours de calendrier sont comblés (mesurés
+# entre les dates des relevés valides qui les encadrent, dates absentes comprises) :
+# les trous plus longs (ex: humidité absente sur toute l'année 2023) et les bords
+# de série restent NaN. La colonne '<colonne>_source' indique l'origine de chaque valeur.
 
-def traitement_meteo(df_meteo):
-    df_meteo['Date'] = pd.to_datetime(df_meteo['Date'])
-    df_meteo = traitement_pluie(df_meteo)
-    df_meteo = traitement_temperature(df_meteo)
-    df_meteo = traitement_humidite(df_meteo)
+MAX_TROU_JOURS = 3
+
+
+def imputer_interpolation(df_meteo, colonne, max_trou=MAX_TROU_JOURS):
+    """
+    Crée '<colonne>_traite' (valeurs interpolées) et '<colonne>_source'
+    ('mesure', 'interpole' ou 'manquant' ; une source déjà renseignée, ex: 'station',
+    est conservée). df_meteo doit être trié par date.
+    """
+    serie = df_meteo[colonne]
+    manquant = serie.isna()
+
+    # Taille de chaque trou en jours : écart entre les relevés valides qui l'encadrent,
+    # moins un (une date absente du tableau compte comme un jour manquant)
+    dates_valides = pd.to_datetime(df_meteo['Date']).where(~manquant)
+    taille_trou = (dates_valides.bfill() - dates_valides.ffill()).dt.days - 1
+
+    interpolee = pd.Series(serie.to_numpy(dtype=float), index=pd.DatetimeIndex(df_meteo['Date']))
+    interpolee = interpolee.interpolate(method='time', limit_area='inside').to_numpy()
+
+    comblable = manquant & (taille_trou <= max_trou) & pd.notna(interpolee)
+    source = df_meteo.get(f'{colonne}_source', pd.Series('mesure', index=df_meteo.index))
+    df_meteo[f'{colonne}_traite'] = serie.mask(comblable, interpolee)
+    df_meteo[f'{colonne}_source'] = np.select([~manquant, comblable], [source, 'interpole'], 'manquant')
     return df_meteo
 
-df_meteo_clean = traitement_meteo(charger_donnees())
-df_meteo_clean = df_meteo_clean.drop(columns=['T°C (12h-15h)', 'Humidité'])
-df_meteo_clean = df_meteo_clean.rename(columns={'T°C (12h-15h)_traite': 'T°C (12h-15h)', 'Humidité_traite': 'Humidité'})    
 
-# Ajout des valeurs du THI (Humidex)
-# THI = (1,8*T + 32) - ((0,55 - 0,0055*H)*(1,8*T -26))
-df_meteo_clean['THI'] = (1.8 * df_meteo_clean['T°C (12h-15h)'] + 32) - ((0.55 - 0.0055 * df_meteo_clean['Humidité']*100) * (1.8 * df_meteo_clean['T°C (12h-15h)'] - 26))
-df_meteo_clean['THI'] = df_meteo_clean['THI'].round(2)
+def traitement_temperature(df_meteo, max_trou=MAX_TROU_JOURS):
+    # Nouvelle colonne pour stocker les valeurs traitées : 'T°C (12h-15h)_traite'
+    return imputer_interpolation(df_meteo, 'T°C (12h-15h)', max_trou)
 
-df_meteo_clean.to_csv('data/intermediaire/df_2_meteo.csv', sep=';', index=False)
+def traitement_humidite(df_meteo, max_trou=MAX_TROU_JOURS):
+    # Nouvelle colonne pour stocker les valeurs traitées : 'Humidité_traite'
+    # Pas de donnée en 2023 : ce trou dépasse max_trou et reste donc NaN
+    return imputer_interpolation(df_meteo, 'Humidité', max_trou)
 
 
+def traitement_meteo(df_meteo, df_station=None):
+    df_meteo['Date'] = pd.to_datetime(df_meteo['Date'])
+    df_meteo = df_meteo.sort_values('Date', kind='mergesort').reset_index(drop=True)
+    if df_station is not None:
+        df_meteo = combler_par_station(df_meteo, df_station)
+    df_meteo = traitement_pluie(df_meteo)
+    df_meteo = traitement_temperature(df_meteo)
+    df_meteo = traitement_humidite(df_meteo)
+    return df_meteo
 
+def nettoyage_meteo(df_meteo, df_station=None, persister=True):
+    """
+    Étape 3 : nettoie les valeurs numériques de la météo (df_1_meteo) et ajoute le THI.
+    Si df_station est fourni (voir charger_station_journalier), les trous sont
+    d'abord comblés par les relevés de la station, puis par interpolation.
+    Le fichier df_2_meteo.csv n'est écrit que si persister est vrai.
+    """
+    df_meteo_clean = traitement_meteo(df_meteo.reset_index(drop=True), df_station)
+    df_meteo_clean = df_meteo_clean.drop(columns=['T°C (12h-15h)', 'Humidité'])
+    df_meteo_clean = df_meteo_clean.rename(columns={'T°C (12h-15h)_traite': 'T°C (12h-15h)', 'Humidité_traite': 'Humidité'})    
+
+    # Ajout des valeurs du THI (Humidex)
+    # THI = (1,8*T + 32) - ((0,55 - 0,0055*H)*(1,8*T -26))
+    df_meteo_clean['THI'] = (1.8 * df_meteo_clean['T°C (12h-15h)'] + 32) - ((0.55 - 0.0055 * df_meteo_clean['Humidité']*100) * (1.8 * df_meteo_clean['T°C (12h-15h)'] - 26))
+    df_meteo_clean['THI'] = df_meteo_clean['THI'].round(2)
+
+    # Chaque valeur numérique est suivie de sa colonne source
+    colonnes = [c for c in df_meteo_clean.columns if not c.endswith('_source')]
+    colonnes = [x for c in colonnes for x in (c, f'{c}_source') if x in df_meteo_clean.columns]
+    df_meteo_clean = df_meteo_clean[colonnes]
+
+    if persister:
+        df_meteo_clean.to_csv('data/intermediaire/df_2_meteo.csv', sep=';', index=False)
+        ecrire_table(df_meteo_clean, 'df_2_meteo')
+    return df_meteo_clean
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Étape 3 : nettoyage des valeurs numériques de la météo.")
+    parser.add_argument('--station', action='store_true',
+                        help=f"comble d'abord les trous avec les relevés horaires de {FICHIER_HISTO}")
+    args = parser.parse_args()
+
+    audit_meteo(charger_donnees())
+    df_station = charger_station_journalier() if args.station else None
+    nettoyage_meteo(charger_donnees(), df_station)
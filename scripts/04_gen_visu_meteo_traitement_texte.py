@@ -1,13 +1,14 @@
 import pandas as pd
 import datetime as dt
 import os
+from stockage import lire_table
 
 def generate_step4_visualization():
     # 1. Charger les données
     # On compare idéalement df_2 (numérique nettoyé) et df_3 (texte traité et catégorisé)
     try:
-        df2 = pd.read_csv('data/intermediaire/df_2_meteo.csv', sep=';')
-        df3 = pd.read_csv('data/intermediaire/df_3_meteo.csv', sep=';')
+        df2 = lire_table('df_2_meteo')
+        df3 = lire_table('df_3_meteo')
     except FileNotFoundError:
         print("Erreur : Fichiers intermediaire non trouvés. Assurez-vous d'avoir exécuté 04_meteo_traitement_texte.py")
         return
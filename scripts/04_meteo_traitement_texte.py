@@ -1,11 +1,8 @@
 import pandas as pd
+import numpy as np
 import re
 import unicodedata
-
-df_meteo = pd.read_csv('data/intermediaire/df_2_meteo.csv', sep=';')
-
-df_meteo['Météo'] = df_meteo['Météo'].str.lower()
-df_meteo['Météo'].value_counts().reset_index().to_csv('data/intermediaire/texte_meteo_count.csv', sep=';', index=False)
+from stockage import ecrire_table, lire_table
 
 MAPPING_CORRECTIF =  {
     'acalmie':'accalmie', 
@@ -18,6 +15,23 @@ MAPPING_CORRECTIF =  {
     'éclairicie':'éclaircies',
     'orage avec grésil':'orage/grésil',
 }
+
+
+def compiler_remplacements(mapping):
+    """
+    Compile un dictionnaire de remplacements en une seule expression régulière
+    (alternance triée du terme le plus long au plus court : le plus long l'emporte).
+    Le coût d'une correction ne dépend plus de la taille du dictionnaire.
+    Un dictionnaire vide donne l'identité (un motif vide correspondrait partout).
+    """
+    if not mapping:
+        return lambda texte: texte
+    motif = re.compile('|'.join(re.escape(terme) for terme in sorted(mapping, key=len, reverse=True)))
+    return lambda texte: motif.sub(lambda m: mapping[m.group(0)], texte)
+
+
+remplacer_correctifs = compiler_remplacements(MAPPING_CORRECTIF)
+
     
 def corriger_terme_meteo(expression):
     if pd.isna(expression) or expression == '' or expression is None:
@@ -26,10 +40,8 @@ def corriger_terme_meteo(expression):
     expression_nettoyee = expression.lower().strip()
     # Essayer de mapper le terme nettoyé
     # On doit rechercher le terme dans l'expression de départ et remplacer uniquement
-    # le terme en question 
-    for terme, correction in MAPPING_CORRECTIF.items():
-        expression_nettoyee = expression_nettoyee.replace(terme, correction)    
-    return expression_nettoyee
+    # le terme en question (tous les termes en une seule passe)
+    return remplacer_correctifs(expression_nettoyee)
 
 def split_meteo(df_meteo):
     # 1. Remplacer les NaN par une chaîne vide pour éviter les erreurs lors du .str.split()
@@ -57,8 +69,18 @@ def split_meteo(df_meteo):
     df_meteo = pd.concat([df_meteo, df_split.iloc[:, 0:num_cols].set_axis(colonnes_meteo, axis=1)], axis=1)
     return df_meteo
 
+def corriger_par_valeur_unique(serie):
+    """
+    Applique corriger_terme_meteo une seule fois par chaîne distincte
+    puis diffuse le résultat sur toutes les lignes (les NaN donnent '').
+    """
+    codes, uniques = pd.factorize(serie)
+    corrigees = np.array([corriger_terme_meteo(u) for u in uniques] + [''], dtype=object)
+    return pd.Series(corrigees[codes], index=serie.index)
+
+
 def nettoyage_et_split_meteo(df_meteo):
-    df_meteo['Météo_Corrigée'] = df_meteo['Météo'].apply(corriger_terme_meteo)
+    df_meteo['Météo_Corrigée'] = corriger_par_valeur_unique(df_meteo['Météo'])
     df_meteo = split_meteo(df_meteo)
     return df_meteo
 
@@ -179,41 +201,212 @@ def mapper_terme_meteo(terme):
     # Essayer de mapper le terme nettoyé
     return MAPPING_METEO.get(terme_nettoye, 'AUTRE/NON CLASSE')
 
+# -----------------------------
+# SUGGESTIONS POUR LES TERMES NON CLASSÉS (INDEX DE TRIGRAMMES)
+# -----------------------------
+# Index inversé trigramme -> termes connus de MAPPING_METEO. Pour un terme inconnu,
+# on compte les trigrammes partagés avec chaque terme connu (une seule passe
+# numpy sur les listes d'occurrences) et on en déduit une similarité de Jaccard.
+# Si SEUIL_AUTO_APPLICATION est renseigné, la meilleure suggestion est appliquée
+# automatiquement dès que son score atteint le seuil (désactivé par défaut).
+
+SEUIL_AUTO_APPLICATION = None
+NB_SUGGESTIONS = 3
+
+
+def trigrammes(terme):
+    terme = f"  {terme} "
+    return {terme[i:i + 3] for i in range(len(terme) - 2)}
+
+
+def construire_index_trigrammes(vocabulaire):
+    """
+    Retourne (termes, index {trigramme: tableau d'indices de termes}, nombre de trigrammes par terme).
+    """
+    termes = sorted(vocabulaire)
+    occurrences = {}
+    for i, terme in enumerate(termes):
+        for tri in trigrammes(terme):
+            occurrences.setdefault(tri, []).append(i)
+    index = {tri: np.array(ids, dtype=np.int32) for tri, ids in occurrences.items()}
+    tailles = np.array([len(trigrammes(t)) for t in termes])
+    return termes, index, tailles
+
+
+INDEX_METEO = construire_index_trigrammes(MAPPING_METEO)
+
+
+def suggerer_termes(terme, index=INDEX_METEO, k=NB_SUGGESTIONS):
+    """
+    Retourne les k termes connus les plus proches : liste de (terme connu, score de Jaccard).
+    """
+    termes, index_tri, tailles = index
+    tri_terme = trigrammes(normalize_meteo_text(terme))
+    listes = [index_tri[t] for t in tri_terme if t in index_tri]
+    if not listes:
+        return []
+    communs = np.bincount(np.concatenate(listes), minlength=len(termes))
+    scores = communs / (tailles + len(tri_terme) - communs)
+    k = min(k, len(termes))
+    meilleurs = np.argpartition(-scores, k - 1)[:k]
+    meilleurs = meilleurs[np.argsort(-scores[meilleurs], kind='stable')]
+    return [(termes[i], round(float(scores[i]), 3)) for i in meilleurs if communs[i] > 0]
+
+
+def categoriser_terme_meteo(terme, seuil=None):
+    """
+    mapper_terme_meteo, complété par la meilleure suggestion si son score atteint le seuil.
+    """
+    categorie = mapper_terme_meteo(terme)
+    seuil = SEUIL_AUTO_APPLICATION if seuil is None else seuil
+    if categorie == 'AUTRE/NON CLASSE' and seuil is not None:
+        suggestions = suggerer_termes(terme, k=1)
+        if suggestions and suggestions[0][1] >= seuil:
+            return MAPPING_METEO[suggestions[0][0]]
+    return categorie
+
+
+def suggestions_non_classes(df_long, k=NB_SUGGESTIONS):
+    """
+    Table des suggestions pour les termes restés 'AUTRE/NON CLASSE'
+    (une ligne par terme et par suggestion).
+    """
+    non_classes = df_long.loc[df_long['categorie'] == 'AUTRE/NON CLASSE', 'terme'].astype(str).value_counts()
+    lignes = [
+        {'terme': terme, 'occurrences': nb, 'rang': rang, 'suggestion': suggestion,
+         'categorie_suggeree': MAPPING_METEO[suggestion], 'score': score}
+        for terme, nb in non_classes.items()
+        for rang, (suggestion, score) in enumerate(suggerer_termes(terme, k=k), start=1)
+    ]
+    return pd.DataFrame(lignes, columns=['terme', 'occurrences', 'rang', 'suggestion', 'categorie_suggeree', 'score'])
+
+
 # On va créer de nouvelles colonnes pour les mappings
+# Les colonnes Météo_1..Météo_4 partagent un même type catégoriel : la normalisation
+# et la recherche dans MAPPING_METEO ne sont faites qu'une fois par terme distinct,
+# puis diffusées par les codes des catégories.
+COLONNES_METEO = ['Météo_1', 'Météo_2', 'Météo_3', 'Météo_4']
+
+# Catalogue fixe des catégories : l'ordre donne aussi le bit de chaque catégorie
+# dans Météo_Masque (bit i <=> CATEGORIES_METEO[i])
+CATEGORIES_METEO = sorted(set(MAPPING_METEO.values()) | {'AUTRE/NON CLASSE'})
+TYPE_CATEGORIE_METEO = pd.CategoricalDtype(CATEGORIES_METEO)
+
+
+def types_meteo(vocabulaire):
+    """
+    Retourne le type catégoriel des termes et, pour chaque terme, le code de sa
+    catégorie dans TYPE_CATEGORIE_METEO (mapping calculé une seule fois par terme).
+    Le tableau de codes se termine par -1 pour que le code -1 (valeur manquante)
+    pointe sur une catégorie manquante.
+    """
+    type_terme = pd.CategoricalDtype(pd.unique(np.asarray(vocabulaire, dtype=object)))
+    categories = [categoriser_terme_meteo(terme) for terme in type_terme.categories]
+    codes_cat = np.array([-1 if c is None else TYPE_CATEGORIE_METEO.categories.get_loc(c) for c in categories] + [-1])
+    return type_terme, codes_cat
+
+
 def apply_mapping_meteo(df_meteo):
-    for col in ['Météo_1', 'Météo_2', 'Météo_3', 'Météo_4']:
-        if col in df_meteo.columns:
-            df_meteo[col + '_Cat'] = df_meteo[col].apply(mapper_terme_meteo)
+    cols = [col for col in COLONNES_METEO if col in df_meteo.columns]
+    if not cols:
+        return df_meteo
+
+    # Vocabulaire commun aux quatre colonnes
+    type_terme, codes_cat = types_meteo(np.concatenate([df_meteo[col].dropna().to_numpy(dtype=object) for col in cols]))
+
+    for col in cols:
+        df_meteo[col] = df_meteo[col].astype(type_terme)
+        df_meteo[col + '_Cat'] = pd.Categorical.from_codes(codes_cat[df_meteo[col].cat.codes], dtype=TYPE_CATEGORIE_METEO)
     return df_meteo
-    
-# Regroupement des catégories : Météo_1_Cat, Météo_2_Cat, Météo_3_Cat, Météo_4_Cat
-# Sous la forme Météo_Cat : Météo_1_Cat|Météo_2_Cat|Météo_3_Cat|Météo_4_Cat 
-# si la catégorie n'est pas vide. Si la colonne est vide, on ne met pas de | .
+
+
+# -----------------------------
+# 3. FORMAT LONG ET MASQUE DE CATÉGORIES
+# -----------------------------
+# Une ligne par composant de la météo du jour (sans limite de nombre) :
+# Date, position (1, 2, ...), terme, categorie.
+# Météo_Masque encode l'ensemble des catégories du jour sur un entier :
+# "jours avec ORAGE" devient un test bit à bit (voir jours_avec_categories).
+
+def composants_meteo(df_meteo):
+    termes = df_meteo['Météo_Clean'].str.split('/').explode()
+    df_long = pd.DataFrame({
+        'Date': df_meteo['Date'].to_numpy()[termes.index],
+        'position': termes.groupby(level=0).cumcount().to_numpy() + 1,
+        'terme': termes.str.strip().to_numpy(),
+    }, index=termes.index)
+    df_long = df_long[df_long['terme'].notna() & (df_long['terme'] != '')]
+
+    type_terme, codes_cat = types_meteo(df_long['terme'])
+    df_long['terme'] = df_long['terme'].astype(type_terme)
+    df_long['categorie'] = pd.Categorical.from_codes(codes_cat[df_long['terme'].cat.codes], dtype=TYPE_CATEGORIE_METEO)
+    return df_long
+
+
+def masque_categories(*categories):
+    """
+    Masque binaire correspondant à une ou plusieurs catégories.
+    """
+    return sum(1 << TYPE_CATEGORIE_METEO.categories.get_loc(c) for c in categories)
+
+
+def jours_avec_categories(df_meteo, *categories):
+    """
+    Booléen par jour : vrai si la météo du jour contient au moins une des catégories.
+    """
+    return (df_meteo['Météo_Masque'] & masque_categories(*categories)) != 0
+
+
+# Regroupement des catégories de tous les composants
+# Sous la forme Météo_Cat : Cat_1 | Cat_2 | ... (catégories triées, sans les vides)
 # Exemple : si on a Météo_1_Cat = BEAU, Météo_2_Cat = NUAGES, Météo_3_Cat = '', Météo_4_Cat = '',
-# on aura Météo_Cat = BEAU|NUAGES
-
-def regroupement_meteo(df_meteo):
-  cols = ['Météo_1_Cat', 'Météo_2_Cat', 'Météo_3_Cat', 'Météo_4_Cat']
-  # sécuriser colonnes manquantes
-  for col in cols:
-    if col not in df_meteo.columns:
-      df_meteo[col] = ''
-    
-    # normaliser NaN -> '' + strip
-    df_meteo[cols] = df_meteo[cols].fillna('').apply(lambda s: s.astype(str).str.strip())
-   
-   
-    # concat seulement valeurs non vides et en ordonnant les valeurs
-    df_meteo['Météo_Cat'] = df_meteo[cols].apply(
-        lambda row: ' | '.join(sorted([v for v in row if v != ''])),
-        axis=1
-    )
-    
+# on aura Météo_Cat = BEAU | NUAGES
+# Le masque est l'union (OU bit à bit) des bits des catégories de chaque jour.
+
+def regroupement_meteo(df_meteo, df_long):
+    categorises = df_long[df_long['categorie'].notna()]
+    codes = categorises['categorie'].cat.codes
+
+    # Tri par code = tri alphabétique (CATEGORIES_METEO est trié)
+    tries = categorises['categorie'].astype(str).iloc[np.argsort(codes.to_numpy(), kind='stable')]
+    jointes = tries.groupby(level=0).agg(' | '.join)
+    df_meteo['Météo_Cat'] = jointes.reindex(df_meteo.index, fill_value='')
+
+    # Union des bits : chaque catégorie n'est comptée qu'une fois par jour
+    bits = pd.DataFrame({'ligne': categorises.index, 'code': codes.to_numpy()}).drop_duplicates()
+    masque = np.left_shift(np.int64(1), bits['code'].to_numpy(dtype=np.int64))
+    df_meteo['Météo_Masque'] = (pd.Series(masque).groupby(bits['ligne'].to_numpy()).sum()
+                                .reindex(df_meteo.index, fill_value=0).astype('int64'))
     return df_meteo
 
 
 
-new_df_meteo = nettoyage_et_split_meteo(df_meteo)
-meteo_categories_df = apply_mapping_meteo(new_df_meteo)
-meteo_categories_df = regroupement_meteo(meteo_categories_df)
-meteo_categories_df.to_csv('data/intermediaire/df_3_meteo.csv', sep=';', index=False) 
+def traitement_texte_meteo(df_meteo, persister=True):
+    """
+    Étape 4 : corrige, découpe et catégorise la colonne Météo (df_2_meteo).
+    Retourne (df_3_meteo, composants au format long).
+    Les fichiers texte_meteo_count.csv, df_3_meteo.csv, df_3_meteo_composants.csv
+    et suggestions_meteo_non_classe.csv ne sont écrits que si persister est vrai.
+    """
+    df_meteo = df_meteo.reset_index(drop=True)
+    df_meteo['Météo'] = df_meteo['Météo'].str.lower()
+    if persister:
+        df_meteo['Météo'].value_counts().reset_index().to_csv('data/intermediaire/texte_meteo_count.csv', sep=';', index=False)
+
+    new_df_meteo = nettoyage_et_split_meteo(df_meteo)
+    meteo_categories_df = apply_mapping_meteo(new_df_meteo)
+    df_composants = composants_meteo(meteo_categories_df)
+    meteo_categories_df = regroupement_meteo(meteo_categories_df, df_composants)
+    df_composants = df_composants.reset_index(drop=True)
+    if persister:
+        meteo_categories_df.to_csv('data/intermediaire/df_3_meteo.csv', sep=';', index=False) 
+        ecrire_table(meteo_categories_df, 'df_3_meteo')
+        df_composants.to_csv('data/intermediaire/df_3_meteo_composants.csv', sep=';', index=False)
+        df_suggestions = suggestions_non_classes(df_composants)
+        df_suggestions.to_csv('data/intermediaire/suggestions_meteo_non_classe.csv', sep=';', index=False)
+        print(f"💡 Termes non classés : {df_suggestions['terme'].nunique()} (suggestions dans suggestions_meteo_non_classe.csv)")
+    return meteo_categories_df, df_composants
+
+
+if __name__ == "__main__":
+    traitement_texte_meteo(lire_table('df_2_meteo'))
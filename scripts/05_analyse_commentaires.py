@@ -1,6 +1,9 @@
 import pandas as pd
+import numpy as np
 import os
 import re
+from recherche_commentaires import sans_accents, mettre_a_jour_index
+from stockage import lire_table
 
 
 def nettoyer_commentaires(df_commentaires):
@@ -10,6 +13,9 @@ def nettoyer_commentaires(df_commentaires):
     df_commentaires = df_commentaires.explode('Commentaires_clean')
     df_commentaires['Commentaires_clean'] = df_commentaires['Commentaires_clean'].str.strip()
     df_commentaires = df_commentaires[df_commentaires['Commentaires_clean'] != ""] # Supprimer les segments vides éventuels
+    # Identifiant unique de chaque segment de commentaire (sert de clé aux tables longues)
+    df_commentaires = df_commentaires.reset_index(drop=True)
+    df_commentaires.insert(0, 'id_commentaire', df_commentaires.index)
     return df_commentaires
 
 # Liste exhaustive des poules pour détection
@@ -60,24 +66,151 @@ def definition_categories():
     ]}
     return categories_prioritaires
 
+# Autres façons d'écrire le nom d'une poule (en minuscules, sans accents) : alias -> poules
+ALIAS_POULES = {
+    'pioupiou': ['Pioupioute'],
+    'nina et tina': ['Nina', 'Tina'],
+}
+
+# Groupes dont une mention peut être développée en mentions de chacun des membres
+GROUPES_POULES = {
+    'Marans': ['Albertine', 'Nina', 'Tina'],
+}
+
+def compiler_extracteur_poules(poules=liste_poules, alias=ALIAS_POULES):
+    """
+    Compile tous les noms et alias en une seule alternance (la plus longue forme d'abord),
+    insensible à la casse et aux accents.
+    Retourne (motif compilé, {forme normalisée: [poules]}).
+    """
+    formes = {sans_accents(p.lower()): [p] for p in poules}
+    formes.update(alias)
+    # \b pour éviter de trouver 'Tina' dans 'Matinal' par exemple
+    motif = re.compile(r'\b(?:' + '|'.join(re.escape(f) for f in sorted(formes, key=len, reverse=True)) + r')\b')
+    return motif, formes
+
+
+EXTRACTEUR_POULES = compiler_extracteur_poules()
+
+def poules_mentionnees(texte, extracteur=EXTRACTEUR_POULES):
+    """
+    Poules citées dans un texte, sans doublon, dans l'ordre de liste_poules.
+    """
+    motif, formes = extracteur
+    trouvees = {p for m in motif.finditer(sans_accents(str(texte).lower())) for p in formes[m.group(0)]}
+    ordre = liste_poules + sorted(trouvees - set(liste_poules))
+    return [p for p in ordre if p in trouvees]
+
 def identifier_poules(texte):
-    texte_lower = str(texte).lower()
-    trouvees = []
-    for p in liste_poules:
-        # On utilise des regex pour éviter de trouver 'Tina' dans 'Matinal' par exemple
-        if re.search(r'\b' + p.lower() + r'\b', texte_lower):
-            trouvees.append(p)
+    trouvees = poules_mentionnees(texte)
     return ", ".join(trouvees) if trouvees else "Aucune"
 
-def categoriser_unique(texte):
-    categories_prioritaires = definition_categories()
+def mentions_poules(df_commentaires, developper_groupes=False, groupes=GROUPES_POULES):
+    """
+    Table longue (id_commentaire, Date, poule) des poules citées, un seul passage
+    de l'extracteur par commentaire distinct.
+    developper_groupes : remplace la mention d'un groupe (ex: Marans) par ses membres.
+    """
+    codes, uniques = pd.factorize(df_commentaires['Commentaires_clean'])
+    df_uniques = pd.DataFrame(
+        [(i, p) for i, texte in enumerate(uniques) for p in poules_mentionnees(texte)],
+        columns=['code', 'poule'])
+    if developper_groupes:
+        df_uniques['poule'] = df_uniques['poule'].map(lambda p: groupes.get(p, [p]))
+        df_uniques = df_uniques.explode('poule').drop_duplicates()
+
+    df_codes = pd.DataFrame({'id_commentaire': df_commentaires['id_commentaire'].to_numpy(),
+                             'Date': df_commentaires['Date'].to_numpy(), 'code': codes})
+    df_mentions = df_codes.merge(df_uniques, on='code').drop(columns='code')
+    return df_mentions.sort_values('id_commentaire', kind='mergesort').reset_index(drop=True)
+
+def compiler_categoriseur(categories_prioritaires):
+    """
+    Compile toutes les catégories en une seule expression régulière :
+    (?=(?P<cat0>mots de la catégorie 0)|(?P<cat1>...)|...), les groupes étant rangés
+    par ordre de priorité. Le motif est vide (lookahead) : finditer le teste une fois
+    à chaque position du texte et lastgroup donne la catégorie la plus prioritaire
+    qui commence à cette position.
+    Retourne (motif compilé, {nom du groupe: rang de priorité}, liste des catégories).
+    """
+    categories = list(categories_prioritaires)
+    groupes = [
+        f'(?P<cat{i}>' + '|'.join(f'(?:{kw})' for kw in categories_prioritaires[cat]) + ')'
+        for i, cat in enumerate(categories)
+    ]
+    rangs = {f'cat{i}': i for i in range(len(categories))}
+    return re.compile('(?=' + '|'.join(groupes) + ')'), rangs, categories
+
+
+# Catégoriseur construit une seule fois pour tout le script
+CATEGORISEUR = compiler_categoriseur(definition_categories())
+
+def categoriser_unique(texte, categoriseur=CATEGORISEUR):
+    motif, rangs, categories = categoriseur
     texte = str(texte).lower()
-    # On cherche la première catégorie qui matche (Ordre de priorité respecté)
-    for cat, keywords in categories_prioritaires.items():
-        for kw in keywords:
-            if re.search(kw, texte):
-                return cat
-    return "Autre"
+    # Un seul parcours du texte : on garde la catégorie de plus haute priorité trouvée
+    meilleur = len(categories)
+    for m in motif.finditer(texte):
+        meilleur = min(meilleur, rangs[m.lastgroup])
+        if meilleur == 0:
+            break
+    return categories[meilleur] if meilleur < len(categories) else "Autre"
+
+def categoriser_serie(commentaires, categoriseur=CATEGORISEUR):
+    """
+    Catégorise une série de commentaires : un seul passage du motif par commentaire distinct.
+    """
+    codes, uniques = pd.factorize(commentaires)
+    # Le code -1 (valeur manquante) pointe sur le dernier élément
+    categories = np.array([categoriser_unique(c, categoriseur) for c in uniques]
+                          + [categoriser_unique(np.nan, categoriseur)], dtype=object)
+    return pd.Series(categories[codes], index=commentaires.index)
+
+# -----------------------------
+# ÉTIQUETAGE MULTIPLE
+# -----------------------------
+# Contrairement à categoriser_unique (première catégorie seulement), chaque commentaire
+# reçoit toutes les catégories dont au moins un mot-clé apparaît. Le résultat est une
+# table longue (id_commentaire, Date, categorie, mot_cle) : une ligne par mot-clé trouvé.
+
+MOTIFS_CATEGORIES = {cat: re.compile('|'.join(f'(?:{kw})' for kw in mots_cles))
+                     for cat, mots_cles in definition_categories().items()}
+
+def etiqueter_commentaires(df_commentaires, motifs=MOTIFS_CATEGORIES):
+    """
+    Table longue des étiquettes, un seul passage des motifs par commentaire distinct.
+    """
+    codes, uniques = pd.factorize(df_commentaires['Commentaires_clean'])
+    trouves = [
+        (i, cat, m.group(0))
+        for i, texte in enumerate(uniques)
+        for cat, motif in motifs.items()
+        for m in motif.finditer(str(texte).lower())
+    ]
+    df_uniques = pd.DataFrame(trouves, columns=['code', 'categorie', 'mot_cle']).drop_duplicates()
+
+    df_codes = pd.DataFrame({'id_commentaire': df_commentaires['id_commentaire'].to_numpy(),
+                             'Date': df_commentaires['Date'].to_numpy(), 'code': codes})
+    df_etiquettes = df_codes.merge(df_uniques, on='code').drop(columns='code')
+    df_etiquettes['categorie'] = pd.Categorical(df_etiquettes['categorie'], categories=list(motifs))
+    return df_etiquettes.sort_values(['id_commentaire', 'categorie'], kind='mergesort').reset_index(drop=True)
+
+def matrice_etiquettes(df_etiquettes, ids_commentaires):
+    """
+    Matrice indicatrice creuse commentaire × catégorie (int8, 1 si la catégorie est présente).
+    Chaque colonne est un SparseArray construit à partir des positions des commentaires
+    étiquetés (seule une colonne int8 est dense à la fois).
+    """
+    presence = df_etiquettes[['id_commentaire', 'categorie']].drop_duplicates()
+    lignes = pd.Index(ids_commentaires).get_indexer(presence['id_commentaire'])
+    colonnes = {}
+    for categorie in presence['categorie'].cat.categories:
+        colonne = np.zeros(len(ids_commentaires), dtype='int8')
+        colonne[lignes[(presence['categorie'] == categorie).to_numpy() & (lignes >= 0)]] = 1
+        colonnes[categorie] = pd.arrays.SparseArray(colonne, fill_value=0, dtype='int8')
+    matrice = pd.DataFrame(colonnes, index=pd.Index(ids_commentaires, name='id_commentaire'))
+    matrice.columns.name = 'categorie'
+    return matrice
 
 def print_to_file(file_path,text):
  
@@ -92,12 +225,16 @@ def print_to_file(file_path,text):
         # Convertir systématiquement en string pour éviter les crashs
         f.write(str(text) + "\n")
 
-def stats_cat(df_commentaires):
+def stats_cat(df_commentaires, df_etiquettes):
     file_path = 'data/intermediaire/analyse_detaillee_commentaires.txt'
-    # Analyse par catégorie 
-    stats_cat = df_commentaires['Catégorie'].str.split(', ').explode().value_counts()
+    # Analyse par catégorie (une seule catégorie par commentaire)
+    stats_cat = df_commentaires['Catégorie'].value_counts()
     print_to_file(file_path,"\n--- Statistiques par Catégorie de Commentaires ---")
     print_to_file(file_path,stats_cat.to_string())
+    # Étiquetage multiple : sommes des colonnes de la matrice indicatrice
+    matrice = matrice_etiquettes(df_etiquettes, df_commentaires['id_commentaire'])
+    print_to_file(file_path,"\n--- Statistiques par Étiquette (toutes les catégories citées) ---")
+    print_to_file(file_path,matrice.sum().sort_values(ascending=False).to_string())
     categories_prioritaires = definition_categories()
     print_to_file(file_path,"\n--- Exemples par Catégorie ---")
     for cat in categories_prioritaires.keys():
@@ -106,16 +243,34 @@ def stats_cat(df_commentaires):
         for ex in exemples:
             print_to_file(file_path,f" - {ex}")
 
-def all_steps():
-    # Charger les données
-    df_commentaires = pd.read_csv('data/intermediaire/df_1_commentaires.csv', sep=';')
-    df_commentaires = nettoyer_commentaires(df_commentaires)
-    df_commentaires['Catégorie'] = df_commentaires['Commentaires_clean'].apply(categoriser_unique)
-    df_commentaires['Poules_Citées'] = df_commentaires['Commentaires_clean'].apply(identifier_poules)
+def analyse_commentaires(df_commentaires, persister=True):
+    """
+    Étape 5 : découpe, catégorise les commentaires (df_1_commentaires) et identifie les poules citées.
+    Retourne (tableau des commentaires, étiquettes au format long, poules citées au format long).
+    Le tableau détaillé, les tables longues, les statistiques et l'index de recherche
+    (recherche_commentaires.py) ne sont écrits que si persister est vrai.
+    """
+    df_commentaires = nettoyer_commentaires(df_commentaires.reset_index(drop=True))
+    df_commentaires['Catégorie'] = categoriser_serie(df_commentaires['Commentaires_clean'])
+    df_mentions = mentions_poules(df_commentaires)
+    poules_citees = df_mentions.groupby('id_commentaire')['poule'].agg(', '.join)
+    df_commentaires['Poules_Citées'] = df_commentaires['id_commentaire'].map(poules_citees).fillna('Aucune')
+    df_etiquettes = etiqueter_commentaires(df_commentaires)
     
-    stats_cat(df_commentaires)
+    if persister:
+        stats_cat(df_commentaires, df_etiquettes)
+
+        df_commentaires.to_csv('data/intermediaire/tableau_commentaires.csv', index=False, encoding='utf-8-sig', sep=';')
+        print("\nLe tableau détaillé a été exporté dans 'tableau_commentaires.csv'")
+        df_etiquettes.to_csv('data/intermediaire/commentaires_etiquettes.csv', index=False, encoding='utf-8-sig', sep=';')
+        df_mentions.to_csv('data/intermediaire/commentaires_poules.csv', index=False, encoding='utf-8-sig', sep=';')
+        mettre_a_jour_index(df_commentaires, df_mentions)
+    return df_commentaires, df_etiquettes, df_mentions
 
-    df_commentaires.to_csv('data/intermediaire/tableau_commentaires.csv', index=False, encoding='utf-8-sig', sep=';')
-    print("\nLe tableau détaillé a été exporté dans 'tableau_commentaires.csv'")
+def all_steps():
+    # Charger les données
+    df_commentaires = lire_table('df_1_commentaires')
+    analyse_commentaires(df_commentaires)
 
-all_steps()
\ No newline at end of file
+if __name__ == "__main__":
+    all_steps()
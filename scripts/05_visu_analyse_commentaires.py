@@ -8,8 +8,9 @@ def generate_step5_visualization():
     # 1. Charger les données
     try:
         df = pd.read_csv('data/intermediaire/tableau_commentaires.csv', sep=';')
-    except FileNotFoundError:
-        print("Erreur : Fichier data/intermediaire/tableau_commentaires.csv non trouvé.")
+        df_poules = pd.read_csv('data/intermediaire/commentaires_poules.csv', sep=';')
+    except FileNotFoundError as e:
+        print(f"Erreur : Fichier {e.filename} non trouvé.")
         return
 
     # 2. Préparation des statistiques
@@ -21,8 +22,7 @@ def generate_step5_visualization():
     cat_counts.columns = ['Catégorie', 'Nombre']
     
     # Top poules citées
-    all_poules = df['Poules_Citées'].str.split(', ').explode()
-    poule_counts = all_poules[all_poules != 'Aucune'].value_counts()
+    poule_counts = df_poules['poule'].rename('Poules_Citées').value_counts()
     top_poule = poule_counts.index[0] if not poule_counts.empty else "N/A"
     
     # 3. Création du graphique Plotly (Distribution des catégories)
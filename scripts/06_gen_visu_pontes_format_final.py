@@ -1,6 +1,7 @@
 import pandas as pd
 import plotly.express as px
 import os
+from stockage import chemin_table, lire_table
 import calendar
 import locale
 locale.setlocale(locale.LC_TIME, 'French_France.1252')  # Windows
@@ -8,15 +9,13 @@ locale.setlocale(locale.LC_TIME, 'French_France.1252')  # Windows
 
 # Configuration
 output_html = "output/pontes_finale.html"
-input_csv = "data/final/pontes_format_final.csv"
 
 def charger_donnees():
-    if not os.path.exists(input_csv):
-        print(f"Erreur : {input_csv} introuvable.")
+    if not os.path.exists(chemin_table('pontes_format_final')):
+        print(f"Erreur : table pontes_format_final introuvable ({chemin_table('pontes_format_final')}).")
         return None
     
-    # Lecture brute
-    df = pd.read_csv(input_csv, sep=';')
+    df = lire_table('pontes_format_final')
     
     # Conversion forcée
     df['Date'] = pd.to_datetime(df['Date'])
@@ -3,28 +3,38 @@ import plotly.express as px
 import os
 import calendar
 import locale
-locale.setlocale(locale.LC_TIME, 'French_France.1252')  # Windows
+from stockage import chemin_table, ecrire_table, lire_table
+from matrice_pontes import depuis_long, taux_par_periode
 
-# Charger les données
-df_2_pontes = pd.read_csv('data/intermediaire/df_2_pontes.csv', sep=';')
-df_2_pontes.fillna({'Remarques': 'RAS'}, inplace=True)
+# Configuration
+output_html = "output/pontes_finale.html"
+output_csv = "data/final/pontes_format_final.csv"
 
-df_final = df_2_pontes[['Date', 'Poule_brute','niveau_observation','Ponte', 'Etat_oeuf', 'Doute', 'Effectif', 'Remarques']].copy()
-df_final.rename(columns={'Poule_brute': 'Poule'}, inplace=True)
+def format_final(df_2_pontes, persister=True):
+    """
+    Étape 6 : format final des pontes (df_2_pontes → pontes_format_final).
+    Le fichier pontes_format_final.csv n'est écrit que si persister est vrai.
+    """
+    df_2_pontes = df_2_pontes.copy()
+    # Une remarque vide devient NaN lors de l'aller-retour CSV : même traitement en mémoire
+    df_2_pontes['Remarques'] = df_2_pontes['Remarques'].replace('', None)
+    df_2_pontes.fillna({'Remarques': 'RAS'}, inplace=True)
 
-df_final.to_csv('data/final/pontes_format_final.csv', sep=';', index=False)
+    df_final = df_2_pontes[['Date', 'Poule_brute','niveau_observation','Ponte', 'Etat_oeuf', 'Doute', 'Effectif', 'Remarques']].copy()
+    df_final.rename(columns={'Poule_brute': 'Poule'}, inplace=True)
+    df_final['Date'] = pd.to_datetime(df_final['Date'])
 
-# Configuration
-output_html = "output/pontes_finale.html"
-input_csv = "data/final/pontes_format_final.csv"
+    if persister:
+        df_final.to_csv(output_csv, sep=';', index=False)
+        ecrire_table(df_final, 'pontes_format_final')
+    return df_final
 
 def charger_donnees():
-    if not os.path.exists(input_csv):
-        print(f"Erreur : {input_csv} introuvable.")
+    if not os.path.exists(chemin_table('pontes_format_final')):
+        print(f"Erreur : table pontes_format_final introuvable ({chemin_table('pontes_format_final')}).")
         return None
     
-    # Lecture brute
-    df = pd.read_csv(input_csv, sep=';')
+    df = lire_table('pontes_format_final')
     
     # Conversion forcée
     df['Date'] = pd.to_datetime(df['Date'])
@@ -46,6 +56,10 @@ def generer_visualisations(df):
     figures = []
     explanations = []
     
+    # Matrices jour × poule : toutes les sommes par période en sont déduites
+    matrice = depuis_long(df)
+    type_poule = lambda poules: poules.map(lambda x: 'Groupe' if x == 'MARANS' else 'Poule Seule')
+
     # Tri pour la chronologie
     df_sorted = df.sort_values(['Poule', 'Date']).copy()
     
@@ -81,14 +95,9 @@ def generer_visualisations(df):
     
     # 2. Évolution du taux de ponte mensuel
     # --------------------------------------
-    mensuel = df.groupby(['Annee_Mois', 'Poule', 'Type']).agg({
-        'Ponte': 'sum',
-        'Effectif': 'sum'
-    }).reset_index()
-    
-    mensuel['Taux de Ponte (%)'] = 0.0
-    mask = mensuel['Effectif'] > 0
-    mensuel.loc[mask, 'Taux de Ponte (%)'] = (mensuel.loc[mask, 'Ponte'] / mensuel.loc[mask, 'Effectif'] * 100).round(1)
+    mensuel = taux_par_periode(matrice, 'mois').rename(columns={'Taux': 'Taux de Ponte (%)'})
+    mensuel.insert(2, 'Type', type_poule(mensuel['Poule']))
+    mensuel['Taux de Ponte (%)'] = mensuel['Taux de Ponte (%)'].fillna(0.0)
     
     fig2 = px.line(mensuel, 
                    x='Annee_Mois', 
@@ -112,7 +121,8 @@ def generer_visualisations(df):
 
     # 3. Total annuel
     # ---------------
-    annuel = df.groupby(['Annee', 'Poule', 'Type']).agg({'Ponte': 'sum'}).reset_index()
+    annuel = taux_par_periode(matrice, 'annee')[['Annee', 'Poule', 'Ponte']]
+    annuel.insert(2, 'Type', type_poule(annuel['Poule']))
     annuel['Année'] = annuel['Annee'].astype(str)
     fig3 = px.bar(annuel, x='Année', y='Ponte', color='Poule', barmode='group',
                   title="📊 Production Annuelle Totale d'Œufs", template="plotly_white")
@@ -127,8 +137,8 @@ def generer_visualisations(df):
 
     # 4. Performance globale
     # ----------------------
-    global_stats = df.groupby(['Poule', 'Type']).agg({'Ponte': 'sum', 'Effectif': 'sum'}).reset_index()
-    global_stats['Taux_Moyen (%)'] = (global_stats['Ponte'] / global_stats['Effectif'] * 100).round(1)
+    global_stats = taux_par_periode(matrice, 'global').rename(columns={'Taux': 'Taux_Moyen (%)'})
+    global_stats.insert(1, 'Type', type_poule(global_stats['Poule']))
     global_stats = global_stats.sort_values(by='Taux_Moyen (%)', ascending=False)
     
     fig4 = px.bar(global_stats, x='Poule', y='Taux_Moyen (%)', color='Type',
@@ -151,8 +161,7 @@ def generer_visualisations(df):
     # 5. Saisonnalité (Heatmap)
     # -------------------------
 
-    heat_data = df.groupby(['Jour', 'Mois']).agg({'Ponte': 'sum', 'Effectif': 'sum'}).reset_index()
-    heat_data['Taux'] = (heat_data['Ponte'] / heat_data['Effectif'] * 100).round(1)
+    heat_data = taux_par_periode(matrice, 'jour_mois', par_poule=False).drop(columns='Poule')
     
     pivot = heat_data.pivot(index='Mois', columns='Jour', values='Taux')
     pivot.index = pivot.index.map(lambda m: calendar.month_name[m].capitalize())
@@ -249,6 +258,11 @@ def sauvegarder_html(figures, explanations):
     print(f"✅ Analyse terminée. Rapport généré : {output_html}")
 
 if __name__ == "__main__":
+    locale.setlocale(locale.LC_TIME, 'French_France.1252')  # Windows
+
+    # Charger les données
+    format_final(lire_table('df_2_pontes'))
+
     print("🚀 Démarrage de l'analyse finale...")
     data = charger_donnees()
     if data is not None:
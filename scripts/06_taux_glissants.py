@@ -0,0 +1,116 @@
+import json
+import os
+import pandas as pd
+from stockage import ecrire_table, lire_table
+from matrice_pontes import depuis_long, taux_glissants
+
+# ===========================================================================
+# TAUX DE PONTE GLISSANTS (SURVEILLANCE DES BAISSES DE PRODUCTION)
+# ===========================================================================
+# Pour chaque relevé de pontes_format_final, taux de ponte (%) = somme(Ponte) /
+# somme(Effectif) sur les 7, 14, 30 et 90 derniers jours du calendrier, pour la
+# poule (Taux_7j...) et pour tout le poulailler (Taux_Poulailler_7j...).
+# Les jours sans relevé comptent pour 0 dans les deux sommes.
+#
+# Les taux sont mis en cache avec une empreinte par jour. Si les seuls changements
+# sont des jours ajoutés après le dernier jour connu, seuls ces jours sont
+# recalculés, à partir des relevés de la fenêtre la plus longue qui les précède.
+# Le cache n'est valable que pour les mêmes FENETRES (conservées avec les empreintes).
+
+FENETRES = [7, 14, 30, 90]
+REPERTOIRE_CACHE = 'data/cache/taux_glissants'
+output_csv = "data/final/pontes_taux_glissants.csv"
+
+COLONNES_TAUX = [f'Taux_{f}j' for f in FENETRES] + [f'Taux_Poulailler_{f}j' for f in FENETRES]
+
+
+def empreintes_jours(df):
+    """
+    Empreinte de chaque jour (Poule, Ponte, Effectif), indépendante de l'ordre des lignes.
+    """
+    hash_lignes = pd.util.hash_pandas_object(df[['Date', 'Poule', 'Ponte', 'Effectif']], index=False)
+    return hash_lignes.groupby(df['Date'].dt.strftime('%Y-%m-%d').to_numpy()).sum().astype('uint64')
+
+
+def calculer_taux(df):
+    """
+    Taux glissants de chaque relevé (Date, Poule) de df.
+    """
+    matrice = depuis_long(df)
+    i = matrice.dates.get_indexer(df['Date'])
+    j = matrice.poules.get_indexer(df['Poule'])
+    taux = pd.DataFrame({'Date': df['Date'].to_numpy(), 'Poule': df['Poule'].to_numpy()})
+    for fenetre in FENETRES:
+        par_poule, poulailler = taux_glissants(matrice, fenetre)
+        taux[f'Taux_{fenetre}j'] = par_poule[i, j]
+        taux[f'Taux_Poulailler_{fenetre}j'] = poulailler[i]
+    return taux[['Date', 'Poule'] + COLONNES_TAUX]
+
+
+def taux_en_cache(df, repertoire=REPERTOIRE_CACHE):
+    """
+    Retourne les taux glissants de df en ne recalculant que les jours ajoutés
+    à la fin de l'historique (tout est recalculé si un jour connu a changé).
+    """
+    empreintes = empreintes_jours(df)
+    chemin_taux = os.path.join(repertoire, 'taux.parquet')
+    chemin_empreintes = os.path.join(repertoire, 'empreintes.json')
+
+    contenu = {}
+    if os.path.exists(chemin_empreintes) and os.path.exists(chemin_taux):
+        with open(chemin_empreintes, encoding='utf-8') as f:
+            contenu = json.load(f)
+    # Empreintes ignorées (calcul complet) si les fenêtres ont changé
+    anciennes = contenu.get('jours', {}) if contenu.get('fenetres') == FENETRES else {}
+
+    nouveaux = empreintes.index.difference(list(anciennes))
+    ajout_en_fin = (
+        len(anciennes) > 0
+        and all(empreintes.get(j) is not None and str(empreintes[j]) == h for j, h in anciennes.items())
+        and (len(nouveaux) == 0 or nouveaux.min() > max(anciennes))
+    )
+
+    if not ajout_en_fin:
+        print(f"📉 Taux glissants : calcul complet ({len(empreintes)} jours)")
+        taux = calculer_taux(df)
+    elif len(nouveaux) == 0:
+        print("📉 Taux glissants : à jour (cache)")
+        return pd.read_parquet(chemin_taux)
+    else:
+        # Seuls les jours de la plus longue fenêtre précédant le premier nouveau jour sont relus
+        debut_nouveaux = pd.Timestamp(nouveaux.min())
+        debut_fenetre = debut_nouveaux - pd.Timedelta(days=max(FENETRES) - 1)
+        taux_nouveaux = calculer_taux(df[df['Date'] >= debut_fenetre])
+        taux_nouveaux = taux_nouveaux[taux_nouveaux['Date'] >= debut_nouveaux]
+        print(f"📉 Taux glissants : {len(nouveaux)} jours ajoutés")
+        taux = pd.concat([pd.read_parquet(chemin_taux), taux_nouveaux], ignore_index=True)
+
+    os.makedirs(repertoire, exist_ok=True)
+    taux.to_parquet(chemin_taux + '.tmp', index=False)
+    os.replace(chemin_taux + '.tmp', chemin_taux)
+    with open(chemin_empreintes + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'fenetres': FENETRES, 'jours': {j: str(h) for j, h in empreintes.items()}}, f)
+    os.replace(chemin_empreintes + '.tmp', chemin_empreintes)
+    return taux
+
+
+def ajouter_taux_glissants(pontes_df, persister=True):
+    """
+    Étape 6 (suite) : ajoute les taux glissants par poule et par poulailler
+    aux pontes (pontes_format_final → pontes_taux_glissants).
+    Le fichier pontes_taux_glissants.csv n'est écrit que si persister est vrai.
+    """
+    df = pontes_df.copy()
+    df['Date'] = pd.to_datetime(df['Date'])
+    taux = taux_en_cache(df)
+    df = df.merge(taux, on=['Date', 'Poule'], how='left')
+
+    if persister:
+        df.to_csv(output_csv, sep=';', index=False)
+        ecrire_table(df, 'pontes_taux_glissants')
+    return df
+
+
+if __name__ == "__main__":
+    pontes_df = lire_table('pontes_format_final')
+    ajouter_taux_glissants(pontes_df)
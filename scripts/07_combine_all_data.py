@@ -1,27 +1,203 @@
 import pandas as pd
 import os
+import sqlite3
+from stockage import ecrire_table, lire_table
+from cube_kpi import mettre_a_jour_cube
 
-meteo_df = pd.read_csv('data/intermediaire/df_3_meteo.csv', sep=';', encoding='utf-8')
-pontes_df = pd.read_csv('data/final/pontes_format_final.csv', sep=';', encoding='utf-8')
+# ===========================================================================
+# BASE SQLITE D'ANALYSE (SCHÉMA EN ÉTOILE)
+# ===========================================================================
+# En plus de pontes_meteo.csv, l'étape 7 matérialise les données finales dans
+# data/final/pontes.sqlite :
+#   fact_ponte (date_key, poule_key, ponte, effectif, etat, doute, remarques)
+#   dim_date, dim_poule, dim_meteo
+# avec un index (poule_key, date_key) et des vues prêtes à l'emploi pour les
+# taux de ponte des rapports 06 et 07. date_key est la date au format AAAAMMJJ.
 
-# Vérifier d'abord l'unicité des dates dans le fichier meteo
+FICHIER_SQLITE = 'data/final/pontes.sqlite'
 
-meteo_df['Date'] = pd.to_datetime(meteo_df['Date'])
-pontes_df['Date'] = pd.to_datetime(pontes_df['Date'])
-print(meteo_df['Date'].duplicated().sum())
+SCHEMA_SQLITE = """
+CREATE TABLE dim_date (
+    date_key     INTEGER PRIMARY KEY,
+    date         TEXT NOT NULL,
+    annee        INTEGER NOT NULL,
+    mois         INTEGER NOT NULL,
+    jour         INTEGER NOT NULL,
+    annee_mois   TEXT NOT NULL,
+    jour_semaine INTEGER NOT NULL
+);
+CREATE TABLE dim_poule (
+    poule_key          INTEGER PRIMARY KEY,
+    poule              TEXT NOT NULL UNIQUE,
+    niveau_observation TEXT,
+    type               TEXT NOT NULL
+);
+CREATE TABLE dim_meteo (
+    date_key    INTEGER PRIMARY KEY REFERENCES dim_date(date_key),
+    meteo       TEXT,
+    meteo_cat   TEXT,
+    pluie_mm    REAL,
+    temperature REAL,
+    temp_arrondie REAL,
+    humidite    REAL,
+    thi         REAL
+);
+CREATE TABLE fact_ponte (
+    date_key  INTEGER NOT NULL REFERENCES dim_date(date_key),
+    poule_key INTEGER NOT NULL REFERENCES dim_poule(poule_key),
+    ponte     INTEGER NOT NULL,
+    effectif  INTEGER NOT NULL,
+    etat      TEXT,
+    doute     INTEGER NOT NULL,
+    remarques TEXT
+);
+CREATE UNIQUE INDEX idx_fact_ponte_poule_date ON fact_ponte (poule_key, date_key);
+CREATE INDEX idx_fact_ponte_date ON fact_ponte (date_key);
 
-# Calculer une vue "combinée" du dataframe des pontes en simplifiant le format :
-# 1 date, 1 nombre d'oeufs, 1 effectif (nombre de poules)
-# Il faut regrouper par date et faire la somme des effectifs et des pontes. 
+-- Taux de ponte mensuel par poule (rapport 06)
+CREATE VIEW v_taux_ponte_mensuel AS
+SELECT d.annee_mois, p.poule, p.type,
+       SUM(f.ponte) AS ponte, SUM(f.effectif) AS effectif,
+       CASE WHEN SUM(f.effectif) > 0
+            THEN ROUND(100.0 * SUM(f.ponte) / SUM(f.effectif), 1) ELSE 0 END AS taux_ponte_pct
+FROM fact_ponte f
+JOIN dim_date d USING (date_key)
+JOIN dim_poule p USING (poule_key)
+GROUP BY d.annee_mois, p.poule, p.type;
 
-pontes_agg_df = pontes_df.groupby(['Date']).agg({'Effectif': 'sum', 'Ponte': 'sum'}).reset_index()
+-- Taux de ponte moyen global par poule (rapport 06)
+CREATE VIEW v_taux_ponte_global AS
+SELECT p.poule, p.type,
+       SUM(f.ponte) AS ponte, SUM(f.effectif) AS effectif,
+       ROUND(100.0 * SUM(f.ponte) / NULLIF(SUM(f.effectif), 0), 1) AS taux_moyen_pct
+FROM fact_ponte f
+JOIN dim_poule p USING (poule_key)
+GROUP BY p.poule, p.type;
 
-# Maintenant on peut faire la jointure entre les deux dataframes sur la 
-# colonne Date
+-- Taux de ponte journalier du poulailler avec la météo (rapport 07)
+CREATE VIEW v_taux_ponte_journalier AS
+SELECT d.date, SUM(f.effectif) AS effectif, SUM(f.ponte) AS nombre_pontes,
+       ROUND(100.0 * SUM(f.ponte) / SUM(f.effectif), 1) AS taux_ponte_pct,
+       m.temperature, m.humidite, m.pluie_mm, m.thi, m.meteo_cat
+FROM fact_ponte f
+JOIN dim_date d USING (date_key)
+LEFT JOIN dim_meteo m USING (date_key)
+GROUP BY f.date_key
+HAVING SUM(f.effectif) > 0;
 
-pontes_meteo_df = pd.merge(pontes_agg_df, meteo_df, on='Date', how='left')
+-- Taux de ponte par tranche de température arrondie (rapport 07)
+-- Tranche précalculée dans dim_meteo (ROUND de SQLite n'arrondit pas au pair) ;
+-- les jours d'effectif nul comptent dans nb_jours, comme dans le rapport
+CREATE VIEW v_taux_ponte_temperature AS
+SELECT m.temp_arrondie, SUM(j.nombre_pontes) AS nombre_pontes,
+       SUM(j.effectif) AS effectif, COUNT(*) AS nb_jours,
+       ROUND(100.0 * SUM(j.nombre_pontes) / SUM(j.effectif), 1) AS taux_ponte_pct
+FROM (SELECT date_key, SUM(ponte) AS nombre_pontes, SUM(effectif) AS effectif
+      FROM fact_ponte GROUP BY date_key) j
+JOIN dim_meteo m USING (date_key)
+WHERE m.temp_arrondie IS NOT NULL
+GROUP BY m.temp_arrondie
+HAVING SUM(j.effectif) > 10;
+"""
 
-pontes_meteo_df = pontes_meteo_df.rename(columns={'Ponte': 'Nombre_pontes'})
 
-pontes_meteo_df.to_csv('data/final/pontes_meteo.csv', sep=';', encoding='utf-8', index=False)
+def cle_date(dates):
+    return (dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day).astype('int64')
 
+
+def materialiser_sqlite(pontes_df, meteo_df, chemin=FICHIER_SQLITE):
+    """
+    Écrit le schéma en étoile (tables, index, vues) dans un nouveau fichier SQLite
+    qui remplace l'ancien une fois complet.
+    """
+    dates = pd.Series(pd.to_datetime(pd.concat([pontes_df['Date'], meteo_df['Date']]).unique())).sort_values()
+    dim_date = pd.DataFrame({
+        'date_key': cle_date(dates),
+        'date': dates.dt.strftime('%Y-%m-%d'),
+        'annee': dates.dt.year,
+        'mois': dates.dt.month,
+        'jour': dates.dt.day,
+        'annee_mois': dates.dt.strftime('%Y-%m'),
+        'jour_semaine': dates.dt.dayofweek,
+    })
+
+    dim_poule = (pontes_df[['Poule', 'niveau_observation']].drop_duplicates('Poule')
+                 .sort_values('Poule').reset_index(drop=True)
+                 .rename(columns={'Poule': 'poule'}))
+    dim_poule.insert(0, 'poule_key', dim_poule.index + 1)
+    dim_poule['type'] = dim_poule['niveau_observation'].map({'groupe': 'Groupe'}).fillna('Poule Seule')
+
+    dim_meteo = pd.DataFrame({
+        'date_key': cle_date(pd.to_datetime(meteo_df['Date'])),
+        'meteo': meteo_df['Météo'],
+        'meteo_cat': meteo_df.get('Météo_Cat'),
+        'pluie_mm': meteo_df['Pluie(mm)'],
+        'temperature': meteo_df['T°C (12h-15h)'],
+        # Même arrondi (au pair) que Temp_Arrondie du cube KPI
+        'temp_arrondie': meteo_df['T°C (12h-15h)'].round(0),
+        'humidite': meteo_df['Humidité'],
+        'thi': meteo_df['THI'],
+    })
+
+    fact_ponte = pd.DataFrame({
+        'date_key': cle_date(pd.to_datetime(pontes_df['Date'])),
+        'poule_key': pontes_df['Poule'].map(dict(zip(dim_poule['poule'], dim_poule['poule_key']))),
+        'ponte': pontes_df['Ponte'],
+        'effectif': pontes_df['Effectif'],
+        'etat': pontes_df['Etat_oeuf'],
+        'doute': pontes_df['Doute'].astype(int),
+        'remarques': pontes_df['Remarques'],
+    })
+
+    chemin_tmp = chemin + '.tmp'
+    if os.path.exists(chemin_tmp):
+        os.remove(chemin_tmp)
+    with sqlite3.connect(chemin_tmp) as conn:
+        conn.executescript(SCHEMA_SQLITE)
+        for nom, table in [('dim_date', dim_date), ('dim_poule', dim_poule),
+                           ('dim_meteo', dim_meteo), ('fact_ponte', fact_ponte)]:
+            table.to_sql(nom, conn, if_exists='append', index=False)
+    conn.close()
+    os.replace(chemin_tmp, chemin)
+    print(f"🗄️  Base SQLite écrite : {chemin} ({len(fact_ponte)} pontes, {len(dim_poule)} poules)")
+
+def combiner_pontes_meteo(meteo_df, pontes_df, persister=True):
+    """
+    Étape 7 : jointure des pontes agrégées par date (pontes_format_final)
+    avec la météo (df_3_meteo).
+    Les fichiers pontes_meteo.csv et pontes.sqlite et le cube KPI ne sont écrits que si persister est vrai.
+    """
+    meteo_df = meteo_df.copy()
+    pontes_df = pontes_df.copy()
+
+    # Vérifier d'abord l'unicité des dates dans le fichier meteo
+
+    meteo_df['Date'] = pd.to_datetime(meteo_df['Date'])
+    pontes_df['Date'] = pd.to_datetime(pontes_df['Date'])
+    print(meteo_df['Date'].duplicated().sum())
+
+    # Calculer une vue "combinée" du dataframe des pontes en simplifiant le format :
+    # 1 date, 1 nombre d'oeufs, 1 effectif (nombre de poules)
+    # Il faut regrouper par date et faire la somme des effectifs et des pontes. 
+
+    pontes_agg_df = pontes_df.groupby(['Date']).agg({'Effectif': 'sum', 'Ponte': 'sum'}).reset_index()
+
+    # Maintenant on peut faire la jointure entre les deux dataframes sur la 
+    # colonne Date
+
+    pontes_meteo_df = pd.merge(pontes_agg_df, meteo_df, on='Date', how='left')
+
+    pontes_meteo_df = pontes_meteo_df.rename(columns={'Ponte': 'Nombre_pontes'})
+
+    if persister:
+        pontes_meteo_df.to_csv('data/final/pontes_meteo.csv', sep=';', encoding='utf-8', index=False)
+        ecrire_table(pontes_meteo_df, 'pontes_meteo')
+        materialiser_sqlite(pontes_df, meteo_df)
+        mettre_a_jour_cube(pontes_df, meteo_df)
+    return pontes_meteo_df
+
+
+if __name__ == "__main__":
+    meteo_df = lire_table('df_3_meteo')
+    pontes_df = lire_table('pontes_format_final')
+    combiner_pontes_meteo(meteo_df, pontes_df)
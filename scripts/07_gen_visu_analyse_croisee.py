@@ -2,18 +2,18 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+from stockage import chemin_table, lire_table
+from cube_kpi import CUBOIDES, charger_cube, cumul
 
 # Configuration
-input_csv = "data/final/pontes_meteo.csv"
 output_html = "output/analyse_croisee.html"
 
 def charger_donnees():
-    if not os.path.exists(input_csv):
-        print(f"Erreur : {input_csv} introuvable.")
+    if not os.path.exists(chemin_table('pontes_meteo')):
+        print(f"Erreur : table pontes_meteo introuvable ({chemin_table('pontes_meteo')}).")
         return None
     
-    df = pd.read_csv(input_csv, sep=';')
-    df['Date'] = pd.to_datetime(df['Date'])
+    df = lire_table('pontes_meteo')
     
     # Remplacer les NaN par 0 pour les calculs, sauf météo
     df['Effectif'] = df['Effectif'].fillna(0)
@@ -30,7 +30,7 @@ def calculer_kpis(df):
     
     return df_active
 
-def generer_visualisations(df):
+def generer_visualisations(df, cubes):
     figures = []
     explanations = []
     
@@ -63,14 +63,9 @@ def generer_visualisations(df):
     # 1. Relation Température vs Ponte (Agrégée)
     # ------------------------------------------
     # On agrège par tranche de température pour voir une tendance
-    df['Temp_Arrondie'] = df['T°C (12h-15h)'].round(0)
-    temp_stats = df.groupby('Temp_Arrondie').agg({
-        'Nombre_pontes': 'sum', 
-        'Effectif': 'sum',
-        'Date': 'count'
-    }).reset_index()
-    
-    temp_stats.rename(columns={'Date': 'Nb_Jours'}, inplace=True)
+    # Lecture du cuboïde 'temperature' du cube KPI (un jour compte une fois par tranche)
+    temp_stats = cumul(cubes['temperature'], ['Temp_Arrondie']).rename(
+        columns={'Ponte': 'Nombre_pontes', 'Nb_jours': 'Nb_Jours'})
     
     temp_stats = temp_stats[temp_stats['Effectif'] > 10] # Filtre pour avoir assez de données
     temp_stats['Taux_Ponte_%'] = (temp_stats['Nombre_pontes'] / temp_stats['Effectif'] * 100).round(1)
@@ -96,14 +91,10 @@ def generer_visualisations(df):
 
     # 2. Production Hebdomadaire & Effectif
     # -------------------------------------
-    df['Semaine'] = df['Date'].dt.to_period('W').astype(str)
-    
-    # Agrégation par semaine
-    hebdo = df.groupby('Semaine').agg({
-        'Nombre_pontes': 'sum',
-        'Effectif': 'mean', # Effectif moyen sur la semaine
-        'T°C (12h-15h)': 'mean'
-    }).reset_index()
+    # Agrégation par semaine, lue dans le cuboïde 'hebdo' du cube KPI
+    hebdo = cumul(cubes['hebdo'], ['Semaine']).rename(columns={'Ponte': 'Nombre_pontes'})
+    hebdo['Effectif'] = hebdo['Effectif'] / hebdo['Nb_jours'] # Effectif moyen sur la semaine
+    hebdo['T°C (12h-15h)'] = hebdo['Somme_Temp'] / hebdo['Nb_Temp'].where(hebdo['Nb_Temp'] > 0)
     
     # Calcul du taux de ponte hebdomadaire (Total oeufs / (Moyenne effectif * 7 jours)) * 100
     # Note: On multiplie l'effectif moyen par 7 pour avoir le "nombre de jours-poules" de la semaine
@@ -218,5 +209,6 @@ if __name__ == "__main__":
     print("🚀 Démarrage de l'analyse croisée...")
     df = charger_donnees()
     if df is not None:
-        figs, expls = generer_visualisations(df)
+        cubes = {nom: charger_cube(nom) for nom in CUBOIDES}
+        figs, expls = generer_visualisations(df, cubes)
         sauvegarder_html(figs, expls)
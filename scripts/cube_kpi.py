@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# ===========================================================================
+# CUBE D'AGRÉGATS DES KPI DE PONTE (MISE À JOUR INCRÉMENTALE)
+# ===========================================================================
+# Les sommes de Ponte et d'Effectif (jours-poules) sont pré-calculées une fois
+# pour toutes, pour plusieurs combinaisons de dimensions (cuboïdes) :
+#   mensuel     : mois × poule × Météo_Cat × température arrondie (cube principal)
+#   hebdo       : semaine (niveau poulailler)
+#   jour_mois   : jour × mois (saisonnalité, niveau poulailler)
+#   temperature : température arrondie (niveau poulailler)
+# Toutes les mesures sont additives : Ponte, Effectif, Nb_releves (jours-poules),
+# Nb_jours, Somme_Temp et Nb_Temp (pour les températures moyennes).
+#
+# Une empreinte est conservée pour chaque jour. À la mise à jour, seuls les jours
+# nouveaux sont agrégés puis ajoutés aux cellules existantes ; si un jour déjà
+# intégré a changé ou disparu, ou si CUBOIDES / MESURES ont changé (empreinte
+# des définitions), le cube est reconstruit entièrement.
+
+REPERTOIRE_CUBE = 'data/cache/cube_kpi'
+
+CUBOIDES = {
+    'mensuel':     ['Annee_Mois', 'Poule', 'Météo_Cat', 'Temp_Arrondie'],
+    'hebdo':       ['Semaine'],
+    'jour_mois':   ['Jour', 'Mois'],
+    'temperature': ['Temp_Arrondie'],
+}
+MESURES = ['Ponte', 'Effectif', 'Nb_releves', 'Nb_jours', 'Somme_Temp', 'Nb_Temp']
+
+
+def empreinte_definitions():
+    """
+    Empreinte des définitions du cube (CUBOIDES et MESURES).
+    """
+    definitions = json.dumps({'cuboides': CUBOIDES, 'mesures': MESURES}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(definitions.encode('utf-8')).hexdigest()
+
+
+def fichiers_cube(repertoire=REPERTOIRE_CUBE):
+    """
+    Chemins des fichiers du cube (un Parquet par cuboïde et les empreintes des jours).
+    """
+    return [os.path.join(repertoire, f"{nom}.parquet") for nom in CUBOIDES] + [os.path.join(repertoire, 'empreintes.json')]
+
+
+def faits_journaliers(pontes_df, meteo_df):
+    """
+    Jours-poules (pontes_format_final) enrichis de la météo du jour et des clés de période.
+    """
+    meteo = meteo_df[['Date', 'Météo_Cat', 'T°C (12h-15h)']].copy()
+    meteo['Date'] = pd.to_datetime(meteo['Date'])
+    faits = pontes_df[['Date', 'Poule', 'Ponte', 'Effectif']].copy()
+    faits['Date'] = pd.to_datetime(faits['Date'])
+    faits = faits.merge(meteo, on='Date', how='left')
+    faits['Météo_Cat'] = faits['Météo_Cat'].fillna('').astype(str)
+    faits['Temp_Arrondie'] = faits['T°C (12h-15h)'].round(0)
+    return faits
+
+
+def empreintes_jours(faits):
+    """
+    Empreinte de chaque jour, indépendante de l'ordre des lignes.
+    """
+    hash_lignes = pd.util.hash_pandas_object(faits[['Date', 'Poule', 'Ponte', 'Effectif', 'Météo_Cat', 'T°C (12h-15h)']],
+                                             index=False)
+    return hash_lignes.groupby(faits['Date'].dt.strftime('%Y-%m-%d').to_numpy()).sum().astype('uint64')
+
+
+def agreger(faits, dimensions):
+    """
+    Agrège des jours-poules selon les dimensions d'un cuboïde.
+    Sans la dimension Poule, les jours sont d'abord ramenés au niveau du poulailler.
+    """
+    if 'Poule' not in dimensions:
+        faits = faits.groupby('Date').agg(Ponte=('Ponte', 'sum'), Effectif=('Effectif', 'sum'),
+                                          Nb_releves=('Poule', 'size'),
+                                          **{'T°C (12h-15h)': ('T°C (12h-15h)', 'first')}).reset_index()
+        faits['Temp_Arrondie'] = faits['T°C (12h-15h)'].round(0)
+    else:
+        faits = faits.assign(Nb_releves=1)
+
+    dates = faits['Date']
+    faits = faits.assign(
+        Annee_Mois=dates.dt.to_period('M').astype(str),
+        Semaine=dates.dt.to_period('W').astype(str),
+        Jour=dates.dt.day,
+        Mois=dates.dt.month,
+        Nb_jours=1,
+        Somme_Temp=faits['T°C (12h-15h)'].fillna(0),
+        Nb_Temp=faits['T°C (12h-15h)'].notna().astype(int),
+    )
+    return faits.groupby(dimensions, dropna=False)[MESURES].sum().reset_index()
+
+
+def ajouter_cellules(cube, delta, dimensions):
+    """
+    Ajoute un cube partiel aux cellules existantes (les cellules nouvelles sont créées).
+    """
+    if cube is None or cube.empty:
+        return delta
+    return pd.concat([cube, delta]).groupby(dimensions, dropna=False)[MESURES].sum().reset_index()
+
+
+def charger_cube(nom, repertoire=REPERTOIRE_CUBE):
+    chemin = os.path.join(repertoire, f"{nom}.parquet")
+    return pd.read_parquet(chemin) if os.path.exists(chemin) else None
+
+
+def mettre_a_jour_cube(pontes_df, meteo_df, repertoire=REPERTOIRE_CUBE):
+    """
+    Met à jour le cube à partir des pontes (pontes_format_final) et de la météo (df_3_meteo).
+    Retourne {nom du cuboïde: DataFrame}.
+    """
+    faits = faits_journaliers(pontes_df, meteo_df)
+    empreintes = empreintes_jours(faits)
+    definitions = empreinte_definitions()
+
+    chemin_empreintes = os.path.join(repertoire, 'empreintes.json')
+    contenu = {}
+    if os.path.exists(chemin_empreintes):
+        with open(chemin_empreintes, encoding='utf-8') as f:
+            contenu = json.load(f)
+    # Empreintes des jours valables seulement pour les mêmes définitions du cube
+    memes_definitions = contenu.get('definitions') == definitions
+    anciennes = contenu.get('jours', {}) if memes_definitions else {}
+    cubes = {nom: charger_cube(nom, repertoire) for nom in CUBOIDES}
+
+    communs = set(anciennes) & set(empreintes.index)
+    modifies = [j for j in communs if anciennes[j] != str(empreintes[j])]
+    disparus = set(anciennes) - set(empreintes.index)
+    if not memes_definitions or modifies or disparus or any(c is None for c in cubes.values()):
+        raison = (f"{len(modifies)} jours modifiés, {len(disparus)} disparus" if memes_definitions
+                  else "définitions des cuboïdes ou des mesures modifiées")
+        print(f"🧊 Cube KPI : reconstruction complète ({raison})")
+        cubes = dict.fromkeys(CUBOIDES)
+        nouveaux = empreintes.index
+    else:
+        nouveaux = empreintes.index.difference(list(anciennes))
+        print(f"🧊 Cube KPI : {len(nouveaux)} jours ajoutés")
+
+    if len(nouveaux):
+        faits_nouveaux = faits[faits['Date'].dt.strftime('%Y-%m-%d').isin(nouveaux)]
+        os.makedirs(repertoire, exist_ok=True)
+        for nom, dimensions in CUBOIDES.items():
+            cubes[nom] = ajouter_cellules(cubes[nom], agreger(faits_nouveaux, dimensions), dimensions)
+            chemin = os.path.join(repertoire, f"{nom}.parquet")
+            cubes[nom].to_parquet(chemin + '.tmp', index=False)
+            os.replace(chemin + '.tmp', chemin)
+        with open(chemin_empreintes + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'definitions': definitions, 'jours': {j: str(h) for j, h in empreintes.items()}}, f)
+        os.replace(chemin_empreintes + '.tmp', chemin_empreintes)
+    return cubes
+
+
+def cumul(cube, dimensions):
+    """
+    Remonte un cuboïde sur un sous-ensemble de ses dimensions (O(cellules))
+    et ajoute le taux de ponte (%).
+    """
+    resultat = cube.groupby(dimensions)[MESURES].sum().reset_index()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultat['Taux_Ponte_%'] = (resultat['Ponte'] / resultat['Effectif'] * 100).round(1)
+    return resultat
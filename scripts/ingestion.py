@@ -0,0 +1,216 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import glob
+import os
+
+# ===========================================================================
+# COUCHE D'INGESTION DES CLASSEURS EXCEL BRUTS
+# ===========================================================================
+# Chaque classeur est converti une seule fois en Parquet typé, dans un fichier
+# dont le nom contient l'empreinte (sha256) du contenu du classeur.
+# Tant que les octets du classeur ne changent pas, les étapes relisent le
+# Parquet au lieu de refaire le parsing openpyxl (qui domine le temps d'exécution).
+
+REPERTOIRE_CACHE = 'data/cache/raw'
+ANNEES_PONTE = [2023, 2024, 2025]
+# À incrémenter quand le format des fichiers en cache change (invalide le cache)
+VERSION_CACHE = 2
+
+
+def hash_fichier(chemin, taille_bloc=1 << 20):
+    """
+    Retourne l'empreinte sha256 du contenu d'un fichier (lecture par blocs).
+    """
+    h = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def typer_pour_parquet(df):
+    """
+    Rend un DataFrame lu depuis Excel sérialisable en Parquet.
+    Les colonnes object qui mélangent nombres et textes (ex: 'Marans' en 2024,
+    'T°C poulailler' en 2023) sont converties en texte, les NaN sont conservés.
+    Les positions des valeurs non textuelles sont notées dans df.attrs (écrit dans
+    les métadonnées du Parquet) : l'audit de l'étape 00 les restaure avec
+    restaurer_types_mixtes pour continuer à voir le mélange de types.
+    """
+    df = df.copy()
+    colonnes_mixtes = {}
+    for col in df.columns:
+        if df[col].dtype == object:
+            types = {type(v) for v in df[col].dropna()}
+            if len(types) > 1:
+                colonnes_mixtes[col] = {
+                    type_valeur.__name__: np.flatnonzero(df[col].map(lambda v: type(v) is type_valeur)).tolist()
+                    for type_valeur in types if type_valeur is not str
+                }
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v)).astype('str')
+    df.attrs['colonnes_mixtes'] = colonnes_mixtes
+    return df
+
+
+TYPES_RESTAURABLES = {'int': int, 'float': float, 'bool': lambda v: v == 'True', 'datetime': pd.Timestamp}
+
+
+def restaurer_types_mixtes(df):
+    """
+    Inverse de typer_pour_parquet : les colonnes mixtes redeviennent des colonnes
+    object contenant les valeurs d'origine (nombres et textes).
+    """
+    for col, positions_par_type in df.attrs.get('colonnes_mixtes', {}).items():
+        valeurs = df[col].to_numpy(dtype=object, copy=True)
+        for nom_type, positions in positions_par_type.items():
+            conversion = TYPES_RESTAURABLES.get(nom_type)
+            if conversion is not None:
+                valeurs[positions] = [conversion(v) for v in valeurs[positions]]
+        df[col] = pd.Series(valeurs, index=df.index, dtype=object)
+    df.attrs.pop('colonnes_mixtes', None)
+    return df
+
+
+def lire_excel_cache(chemin, sheet_name=0):
+    """
+    Lit une feuille Excel en passant par le cache Parquet indexé par le hash du classeur.
+    Le classeur n'est re-parsé que si ses octets ont changé.
+    """
+    empreinte = hash_fichier(chemin)[:16]
+    nom = os.path.splitext(os.path.basename(chemin))[0]
+    prefixe = os.path.join(REPERTOIRE_CACHE, f"{nom}__{sheet_name}__")
+    chemin_cache = f"{prefixe}{empreinte}_v{VERSION_CACHE}.parquet"
+
+    if os.path.exists(chemin_cache):
+        return pd.read_parquet(chemin_cache)
+
+    print(f"🔄 Conversion de {chemin} (feuille {sheet_name}) en Parquet...")
+    df = typer_pour_parquet(pd.read_excel(chemin, sheet_name=sheet_name))
+
+    # Suppression des anciennes versions du même classeur puis écriture atomique
+    os.makedirs(REPERTOIRE_CACHE, exist_ok=True)
+    for ancien in glob.glob(f"{glob.escape(prefixe)}*.parquet"):
+        os.remove(ancien)
+    chemin_tmp = chemin_cache + '.tmp'
+    df.to_parquet(chemin_tmp, index=False)
+    os.replace(chemin_tmp, chemin_cache)
+    return df
+
+
+def charger_classeurs_ponte(annees=ANNEES_PONTE):
+    """
+    Retourne un dictionnaire {année: DataFrame} des classeurs data/raw/ponte_AAAA.xlsx.
+    """
+    return {annee: lire_excel_cache(f'data/raw/ponte_{annee}.xlsx') for annee in annees}
+
+
+# ===========================================================================
+# LECTURE EN FLUX DE L'HISTORIQUE HORAIRE DE LA STATION
+# ===========================================================================
+# Agrégats journaliers calculés à partir de Histo_Meteo.xlsx
+# (même syntaxe que les agrégations nommées de pandas : nom = (colonne, fonction)).
+# Un agrégat peut aussi s'écrire (colonne, fonction, heures, decalage_heures) :
+#   heures          : (début, fin) ne garde que les relevés de début:00 à fin:00 inclus
+#   decalage_heures : décale l'horodatage avant de le rattacher à un jour
+#                     (ex: 16 rattache les relevés de 8h la veille à 7h au jour J)
+# Fonctions disponibles : mean, min, max, sum, count.
+
+AGREGATS_HISTO_JOUR = {
+    'Histo_Temp_moy':  ('Temp_C',       'mean'),
+    'Histo_Temp_max':  ('Temp_C',       'max'),
+    'Histo_Temp_min':  ('Temp_C',       'min'),
+    'Histo_Hum_moy':   ('Humidite_pct', 'mean'),
+    'Histo_Hum_min':   ('Humidite_pct', 'min'),
+    'Histo_Hum_max':   ('Humidite_pct', 'max'),
+    'Histo_Pluie_sum': ('Pluie_mm',     'sum'),
+    'Histo_THI_moy':   ('THI',          'mean'),
+    'Histo_THI_max':   ('THI',          'max'),
+}
+
+
+def dans_fenetre_horaire(horodatage, heures):
+    """
+    Vrai si l'horodatage est compris entre heures[0]:00 et heures[1]:00 (bornes incluses).
+    """
+    debut, fin = heures
+    if horodatage.hour == fin:
+        return horodatage.minute == 0 and horodatage.second == 0
+    return debut <= horodatage.hour < fin
+
+
+def agreger_histo_meteo_journalier(chemin, sheet_name='Histo_Meteo', agregats=AGREGATS_HISTO_JOUR,
+                                   colonne_date='Date_Heure'):
+    """
+    Lit l'export horaire de la station ligne à ligne (openpyxl en lecture seule)
+    et replie chaque relevé directement dans les agrégats journaliers
+    (mean, min, max, sum, count), sans jamais charger la feuille complète en mémoire.
+    La mémoire utilisée dépend du nombre de jours, pas du nombre de relevés.
+    Un jour apparaît dès qu'un relevé horodaté le concerne ; une moyenne (min, max)
+    sans valeur numérique vaut NaN, une somme 0.
+
+    Retourne (df_jour, nb_lignes, premier_releve, dernier_releve).
+    """
+    import openpyxl
+
+    regles = []
+    for nom, definition in agregats.items():
+        colonne, _, heures, decalage = tuple(definition) + (None, 0)[len(definition) - 2:]
+        regles.append((nom, colonne, heures, pd.Timedelta(hours=decalage)))
+    # Par jour et par agrégat : [nombre, somme, min, max]
+    accumulateurs = {}
+    nb_lignes = 0
+    premier_releve, dernier_releve = None, None
+
+    wb = openpyxl.load_workbook(chemin, read_only=True, data_only=True)
+    try:
+        lignes = wb[sheet_name].iter_rows(values_only=True)
+        entete = next(lignes)
+        position = {nom: i for i, nom in enumerate(entete)}
+        idx_date = position[colonne_date]
+        regles = [(nom, position[colonne], heures, decalage) for nom, colonne, heures, decalage in regles]
+
+        for ligne in lignes:
+            horodatage = ligne[idx_date]
+            if horodatage is None:
+                continue
+            horodatage = pd.Timestamp(horodatage)
+            nb_lignes += 1
+            if premier_releve is None or horodatage < premier_releve:
+                premier_releve = horodatage
+            if dernier_releve is None or horodatage > dernier_releve:
+                dernier_releve = horodatage
+
+            for nom, idx, heures, decalage in regles:
+                if heures is not None and not dans_fenetre_horaire(horodatage, heures):
+                    continue
+                jour = accumulateurs.setdefault((horodatage + decalage).normalize(), {})
+                acc = jour.setdefault(nom, [0, 0.0, None, None])
+                valeur = ligne[idx]
+                if not isinstance(valeur, (int, float)) or valeur != valeur:
+                    continue
+                acc[0] += 1
+                acc[1] += valeur
+                acc[2] = valeur if acc[2] is None or valeur < acc[2] else acc[2]
+                acc[3] = valeur if acc[3] is None or valeur > acc[3] else acc[3]
+    finally:
+        wb.close()
+
+    def finaliser(acc, fonction):
+        n, somme, mini, maxi = acc
+        if fonction == 'sum':
+            return somme
+        if fonction == 'count':
+            return n
+        if n == 0:
+            return np.nan
+        return {'mean': somme / n, 'min': mini, 'max': maxi}[fonction]
+
+    df_jour = pd.DataFrame(
+        [{'Date': date, **{nom: finaliser(accs.get(nom, [0, 0.0, None, None]), definition[1])
+                           for nom, definition in agregats.items()}}
+         for date, accs in sorted(accumulateurs.items())],
+        columns=['Date'] + list(agregats)
+    )
+    df_jour['Date'] = pd.to_datetime(df_jour['Date'])
+    return df_jour, nb_lignes, premier_releve, dernier_releve
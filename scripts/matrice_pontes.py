@@ -0,0 +1,161 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# ===========================================================================
+# MATRICES DENSES JOUR × POULE POUR LES KPI DE PONTE
+# ===========================================================================
+# Les pontes au format long (une ligne par jour et par poule) sont rangées dans
+# des matrices numpy int8 de forme (nombre de jours, nombre de poules) :
+#   ponte, effectif : valeurs du jour (0 si pas de relevé)
+#   present         : vrai si un relevé existe pour ce jour et cette poule
+# Les taux mensuels, annuels ou saisonniers sont alors des sommes par tranches
+# de lignes (np.bincount sur un libellé de période par jour), sans groupby sur
+# des chaînes de caractères. Les taux glissants (7, 30 jours...) sont des
+# différences de sommes cumulées le long des jours.
+
+MatricePontes = namedtuple('MatricePontes', ['dates', 'poules', 'ponte', 'effectif', 'present'])
+
+
+def depuis_long(df, colonne_poule='Poule'):
+    """
+    Construit les matrices à partir du format long (colonnes Date, Poule, Ponte, Effectif).
+    Le calendrier couvre tous les jours entre la première et la dernière date.
+    """
+    dates_long = pd.to_datetime(df['Date'])
+    dates = pd.date_range(dates_long.min(), dates_long.max(), freq='D')
+    codes_poules, poules = pd.factorize(df[colonne_poule], sort=True)
+
+    i = dates.get_indexer(dates_long)
+    forme = (len(dates), len(poules))
+    ponte = np.zeros(forme, dtype=np.int8)
+    effectif = np.zeros(forme, dtype=np.int8)
+    present = np.zeros(forme, dtype=bool)
+    ponte[i, codes_poules] = pd.to_numeric(df['Ponte'], errors='coerce').fillna(0).to_numpy()
+    effectif[i, codes_poules] = pd.to_numeric(df['Effectif'], errors='coerce').fillna(0).to_numpy()
+    present[i, codes_poules] = True
+    return MatricePontes(dates, pd.Index(poules, name=colonne_poule), ponte, effectif, present)
+
+
+def vers_long(matrice):
+    """
+    Retourne le format long (Date, Poule, Ponte, Effectif) des cellules présentes.
+    """
+    i, j = np.nonzero(matrice.present)
+    return pd.DataFrame({
+        'Date': matrice.dates[i],
+        matrice.poules.name: matrice.poules[j],
+        'Ponte': matrice.ponte[i, j],
+        'Effectif': matrice.effectif[i, j],
+    })
+
+
+def sommes_par_periode(matrice, libelles):
+    """
+    Somme ponte, effectif et nombre de relevés par (période, poule).
+    libelles : code entier de la période de chaque jour (0 .. n-1).
+    Retourne trois matrices (n périodes, n poules).
+    """
+    nb_periodes = int(libelles.max()) + 1
+    nb_poules = len(matrice.poules)
+
+    # Périodes contiguës (mois, années d'un calendrier trié) : sommes par tranches de lignes
+    debuts = np.flatnonzero(np.r_[True, libelles[1:] != libelles[:-1]])
+    if len(debuts) == nb_periodes and np.all(libelles[debuts] == np.arange(nb_periodes)):
+        return tuple(np.add.reduceat(m, debuts, axis=0, dtype=np.int64)
+                     for m in (matrice.ponte, matrice.effectif, matrice.present))
+
+    cellules = (libelles[:, None] * nb_poules + np.arange(nb_poules)).ravel()
+    taille = nb_periodes * nb_poules
+
+    def somme(valeurs):
+        return np.bincount(cellules, weights=valeurs.ravel(), minlength=taille).reshape(nb_periodes, nb_poules)
+
+    return somme(matrice.ponte), somme(matrice.effectif), somme(matrice.present)
+
+
+def periodes(dates, periode):
+    """
+    Libellés des périodes d'un calendrier :
+    'mois' (Annee_Mois AAAA-MM), 'annee' (Annee), 'jour_mois' (Jour, Mois) ou 'global'.
+    Retourne (code entier de la période de chaque jour, DataFrame des périodes triées).
+    """
+    annees, mois, jours = dates.year.to_numpy(), dates.month.to_numpy(), dates.day.to_numpy()
+    if periode == 'mois':
+        cles = annees * 100 + mois
+    elif periode == 'annee':
+        cles = annees
+    elif periode == 'jour_mois':
+        cles = mois * 100 + jours
+    elif periode == 'global':
+        return np.zeros(len(dates), dtype=np.int64), pd.DataFrame(index=range(1))
+    else:
+        raise ValueError(f"Période inconnue : {periode}")
+
+    uniques, codes = np.unique(cles, return_inverse=True)
+    if periode == 'mois':
+        df_periodes = pd.DataFrame({'Annee_Mois': [f"{c // 100}-{c % 100:02d}" for c in uniques]})
+    elif periode == 'annee':
+        df_periodes = pd.DataFrame({'Annee': uniques})
+    else:
+        # Même ordre que groupby(['Jour', 'Mois'])
+        ordre = np.lexsort((uniques // 100, uniques % 100))
+        rang = np.empty_like(ordre)
+        rang[ordre] = np.arange(len(ordre))
+        codes = rang[codes]
+        uniques = uniques[ordre]
+        df_periodes = pd.DataFrame({'Jour': uniques % 100, 'Mois': uniques // 100})
+    return codes, df_periodes
+
+
+def taux_par_periode(matrice, periode, par_poule=True):
+    """
+    Sommes de Ponte et d'Effectif et taux de ponte (%) par période (et par poule).
+    Seules les combinaisons ayant au moins un relevé sont retournées.
+    """
+    codes, df_periodes = periodes(matrice.dates, periode)
+    ponte, effectif, releves = sommes_par_periode(matrice, codes)
+    if not par_poule:
+        ponte, effectif, releves = ponte.sum(axis=1, keepdims=True), effectif.sum(axis=1, keepdims=True), releves.sum(axis=1, keepdims=True)
+        poules = pd.Index(['Tous'], name=matrice.poules.name)
+    else:
+        poules = matrice.poules
+
+    p, j = np.nonzero(releves)
+    resultat = df_periodes.iloc[p].reset_index(drop=True)
+    resultat[poules.name] = poules[j]
+    resultat['Ponte'] = ponte[p, j]
+    resultat['Effectif'] = effectif[p, j]
+    # Taux manquant (NaN) si l'effectif cumulé est nul
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taux = np.where(resultat['Effectif'] > 0, resultat['Ponte'] / resultat['Effectif'] * 100, np.nan)
+    resultat['Taux'] = np.round(taux, 1)
+    return resultat
+
+
+def sommes_glissantes(valeurs, fenetre):
+    """
+    Sommes sur les `fenetre` derniers jours (jour courant compris) de chaque colonne,
+    par différence de sommes cumulées. Les premiers jours ont une fenêtre partielle.
+    """
+    if fenetre < 1:
+        raise ValueError(f"Fenêtre glissante invalide : {fenetre} (au moins 1 jour)")
+    cumul = np.cumsum(valeurs, axis=0, dtype=np.int64)
+    glissant = cumul.copy()
+    glissant[fenetre:] -= cumul[:-fenetre]
+    return glissant
+
+
+def taux_glissants(matrice, fenetre):
+    """
+    Taux de ponte (%) sur une fenêtre glissante de `fenetre` jours du calendrier :
+    matrice (jours, poules) par poule et vecteur (jours,) pour le poulailler.
+    Taux manquant (NaN) si l'effectif cumulé de la fenêtre est nul.
+    """
+    ponte = sommes_glissantes(matrice.ponte, fenetre)
+    effectif = sommes_glissantes(matrice.effectif, fenetre)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        par_poule = np.where(effectif > 0, ponte / effectif * 100, np.nan)
+        poulailler = ponte.sum(axis=1) / effectif.sum(axis=1) * 100
+    poulailler[effectif.sum(axis=1) == 0] = np.nan
+    return np.round(par_poule, 1), np.round(poulailler, 1)
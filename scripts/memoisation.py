@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import sys
+import pandas as pd
+from ingestion import hash_fichier
+
+# ===========================================================================
+# MÉMOÏSATION DES ÉTAPES (STYLE MAKE)
+# ===========================================================================
+# Pour chaque étape exécutée, on enregistre un manifeste contenant :
+# - l'empreinte du code (le script et les modules partagés qu'il utilise),
+# - l'empreinte de chacun de ses fichiers d'entrée (ou répertoires : tables Parquet),
+# - les paramètres d'exécution,
+# - l'empreinte des fichiers produits.
+# À la relance, une étape dont le manifeste est identique et dont les sorties
+# sont toujours présentes (et non modifiées) est sautée.
+
+REPERTOIRE_MANIFESTES = 'data/cache/manifestes'
+
+
+def empreinte_chemin(chemin):
+    """
+    sha256 d'un fichier, ou d'un répertoire (table Parquet partitionnée) à partir
+    des chemins relatifs et des empreintes de tous ses fichiers. None si absent.
+    """
+    if not os.path.exists(chemin):
+        return None
+    if not os.path.isdir(chemin):
+        return hash_fichier(chemin)
+    h = hashlib.sha256()
+    for racine, dossiers, fichiers in os.walk(chemin):
+        dossiers.sort()
+        for nom in sorted(fichiers):
+            fichier = os.path.join(racine, nom)
+            h.update(f"{os.path.relpath(fichier, chemin)}\x1f{hash_fichier(fichier)}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def empreintes(chemins):
+    """
+    Retourne {chemin: sha256} ; None pour un fichier ou répertoire absent.
+    """
+    return {c: empreinte_chemin(c) for c in chemins}
+
+
+def construire_manifeste(code, entrees, params=None):
+    """
+    Construit le manifeste d'une étape avant son exécution.
+    """
+    return {
+        'code': empreintes(code),
+        'entrees': empreintes(entrees),
+        'params': {
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            **(params or {}),
+        },
+    }
+
+
+def chemin_manifeste(nom):
+    return os.path.join(REPERTOIRE_MANIFESTES, f"{nom}.json")
+
+
+def charger_manifeste(nom):
+    chemin = chemin_manifeste(nom)
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def etape_a_jour(nom, manifeste, sorties):
+    """
+    Vrai si l'étape a déjà été exécutée avec le même code, les mêmes entrées
+    et les mêmes paramètres, et que ses sorties n'ont pas bougé depuis.
+    """
+    precedent = charger_manifeste(nom)
+    if precedent is None:
+        return False
+    if any(precedent.get(cle) != manifeste[cle] for cle in ('code', 'entrees', 'params')):
+        return False
+    sorties_actuelles = empreintes(sorties)
+    if any(h is None for h in sorties_actuelles.values()):
+        return False
+    return precedent.get('sorties') == sorties_actuelles
+
+
+def enregistrer_manifeste(nom, manifeste, sorties):
+    """
+    Enregistre le manifeste après une exécution réussie (avec l'empreinte des sorties).
+    """
+    os.makedirs(REPERTOIRE_MANIFESTES, exist_ok=True)
+    contenu = dict(manifeste, sorties=empreintes(sorties))
+    chemin = chemin_manifeste(nom)
+    with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(contenu, f, ensure_ascii=False, indent=2)
+    os.replace(chemin + '.tmp', chemin)
@@ -0,0 +1,330 @@
+import importlib
+import argparse
+import subprocess
+import sys
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from ingestion import charger_classeurs_ponte, ANNEES_PONTE
+from registre import FICHIER_REGISTRE
+from recherche_commentaires import FICHIER_INDEX
+from cube_kpi import fichiers_cube
+from stockage import chemin_table
+from memoisation import construire_manifeste, etape_a_jour, enregistrer_manifeste
+
+# ===========================================================================
+# RUNNER DU PIPELINE EN MÉMOIRE (ÉTAPES 00 → 08)
+# ===========================================================================
+# Chaque script d'étape expose une fonction qui prend et retourne des DataFrames.
+# Le runner enchaîne tout le DAG sans relire les CSV intermédiaires : ceux-ci
+# ne sont écrits que si on le demande (persister=True).
+# Par défaut tout tourne dans un seul processus ; avec parallele=True les
+# branches indépendantes sont réparties dans un pool de processus.
+#
+#   classeurs ─ 00 audit
+#       └─ 01 normalisation ─┬─ pontes       : 02 → 06 ──┐  (06 → 06b taux glissants)
+#                            ├─ météo        : 03 → 04 ──┼─ 07 combinaison
+#                            │                     └─ 08 vérification
+#                            └─ commentaires : 05
+#   Histo_Meteo.xlsx ─ 03 station (agrégats journaliers, optionnel) ─→ 03 météo
+
+ETAPES = {
+    '00': '00_audit_donnees',
+    '01': '01_normalisation_format',
+    '02': '02_pontes_nettoyage_et_structuration',
+    '03': '03_meteo_nettoyage_valeurs_numériques',
+    '04': '04_meteo_traitement_texte',
+    '05': '05_analyse_commentaires',
+    '06': '06_pontes_format_final',
+    '06b': '06_taux_glissants',
+    '07': '07_combine_all_data',
+    '08': '08_Check_Historique_Meteo',
+}
+
+
+def etape(numero):
+    """
+    Importe le module d'une étape (les noms de scripts commencent par un chiffre).
+    """
+    return importlib.import_module(ETAPES[numero])
+
+
+def chronometrer(libelle, fonction, *args, **kwargs):
+    debut = time.perf_counter()
+    resultat = fonction(*args, **kwargs)
+    print(f"⏱️  {libelle} : {time.perf_counter() - debut:.2f} s")
+    return resultat
+
+
+# ===========================================================================
+# DÉCLARATION DU DAG
+# ===========================================================================
+# nom de la tâche : Tache(étape, fonction, entrées, sorties, accepte persister)
+# Les entrées/sorties sont des noms de jeux de données : une tâche est prête
+# dès que toutes ses entrées ont été produites.
+
+Tache = namedtuple('Tache', ['etape', 'fonction', 'entrees', 'sorties', 'persiste'])
+
+DAG = {
+    'audit':              Tache('00', 'audit_transverse',         ['classeurs'],            [], False),
+    'normalisation':      Tache('01', 'normalisation_format',     ['classeurs'],
+                                ['df_1_pontes', 'df_1_meteo', 'df_1_commentaires'], True),
+    # Branche pontes
+    'pontes':             Tache('02', 'structurer_pontes',        ['df_1_pontes'],          ['df_2_pontes'], True),
+    'format_final':       Tache('06', 'format_final',             ['df_2_pontes'],          ['pontes_format_final'], True),
+    'taux_glissants':     Tache('06b', 'ajouter_taux_glissants',  ['pontes_format_final'],  ['pontes_taux_glissants'], True),
+    # Branche météo
+    'station':            Tache('03', 'charger_station_journalier', [],                     ['station_jour'], False),
+    'meteo_numerique':    Tache('03', 'nettoyage_meteo',          ['df_1_meteo', 'station_jour'], ['df_2_meteo'], True),
+    'meteo_texte':        Tache('04', 'traitement_texte_meteo',   ['df_2_meteo'],
+                                ['df_3_meteo', 'df_3_meteo_composants'], True),
+    'verification_meteo': Tache('08', 'verifier_coherence_meteo', ['df_3_meteo'],           [], False),
+    # Branche commentaires
+    'commentaires':       Tache('05', 'analyse_commentaires',     ['df_1_commentaires'],
+                                ['tableau_commentaires', 'commentaires_etiquettes', 'commentaires_poules'], True),
+    # Jonction
+    'combinaison':        Tache('07', 'combiner_pontes_meteo',    ['df_3_meteo', 'pontes_format_final'],
+                                ['pontes_meteo'], True),
+}
+
+
+def executer_tache(nom, tache, arguments, persister):
+    """
+    Exécute une tâche et retourne ses sorties sous forme de tuple
+    (fonction de niveau module pour pouvoir être envoyée à un processus du pool).
+    """
+    fonction = getattr(etape(tache.etape), tache.fonction)
+    kwargs = {'persister': persister} if tache.persiste else {}
+    resultat = chronometrer(f"{tache.etape} {nom}", fonction, *arguments, **kwargs)
+    if len(tache.sorties) == 0:
+        return ()
+    if len(tache.sorties) == 1:
+        return (resultat,)
+    return tuple(resultat)
+
+
+def executer_dag(taches, donnees, persister=False, parallele=False, max_workers=None):
+    """
+    Ordonnance les tâches selon leurs dépendances.
+    En mode parallèle, toutes les tâches prêtes sont soumises à un pool de
+    processus : les branches indépendantes (pontes, météo, commentaires)
+    tournent en même temps et se rejoignent à l'étape 07.
+    """
+    donnees = dict(donnees)
+    restantes = dict(taches)
+
+    def pretes():
+        return [nom for nom, t in restantes.items() if all(e in donnees for e in t.entrees)]
+
+    def enregistrer(nom, tache, sorties):
+        donnees.update(zip(tache.sorties, sorties))
+
+    if not parallele:
+        while restantes:
+            prets = pretes()
+            if not prets:
+                raise ValueError(f"Dépendances impossibles à satisfaire : {sorted(restantes)}")
+            nom = prets[0]
+            tache = restantes.pop(nom)
+            enregistrer(nom, tache, executer_tache(nom, tache, [donnees[e] for e in tache.entrees], persister))
+        return donnees
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        en_cours = {}
+        while restantes or en_cours:
+            for nom in pretes():
+                tache = restantes.pop(nom)
+                futur = pool.submit(executer_tache, nom, tache, [donnees[e] for e in tache.entrees], persister)
+                en_cours[futur] = (nom, tache)
+            if not en_cours:
+                raise ValueError(f"Dépendances impossibles à satisfaire : {sorted(restantes)}")
+            terminees, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for futur in terminees:
+                nom, tache = en_cours.pop(futur)
+                enregistrer(nom, tache, futur.result())
+    return donnees
+
+
+def executer_pipeline(persister=False, audit=True, verification_meteo=True, station=False,
+                      parallele=False, max_workers=None):
+    """
+    Exécute toutes les étapes en mémoire et retourne un dictionnaire
+    {nom du jeu de données: DataFrame}.
+    persister : écrit aussi les fichiers intermédiaires et finaux (comme les scripts).
+    station : comble d'abord les trous de la météo avec les relevés horaires de
+    Histo_Meteo.xlsx (désactivé par défaut).
+    parallele : exécute les branches indépendantes dans un pool de processus.
+    """
+    classeurs = chronometrer("Chargement des classeurs", charger_classeurs_ponte)
+
+    taches = dict(DAG)
+    if not audit:
+        del taches['audit']
+    if not verification_meteo:
+        del taches['verification_meteo']
+    donnees = {'classeurs': classeurs}
+    if not station:
+        del taches['station']
+        donnees['station_jour'] = None
+
+    donnees = executer_dag(taches, donnees, persister=persister,
+                           parallele=parallele, max_workers=max_workers)
+    del donnees['classeurs']
+    del donnees['station_jour']
+    return donnees
+
+
+# ===========================================================================
+# MODE FICHIERS : EXÉCUTION DES SCRIPTS AVEC MÉMOÏSATION
+# ===========================================================================
+# Chaque script (étapes 00 → 08 et rapports gen_visu) est déclaré avec le code
+# dont il dépend, ses fichiers d'entrée et ses fichiers de sortie. Un script
+# n'est relancé que si l'un de ces éléments a changé depuis sa dernière exécution
+# (voir memoisation.py). Modifier MAPPING_METEO dans le script 04 ne relance
+# donc que 04, puis ce qui en dépend (rapport 04, 07, 08...) seulement si
+# df_3_meteo.csv a effectivement changé.
+
+Script = namedtuple('Script', ['nom', 'code', 'entrees', 'sorties'])
+
+RAW_PONTES = [f'data/raw/ponte_{annee}.xlsx' for annee in ANNEES_PONTE]
+REGISTRE = FICHIER_REGISTRE
+HISTO_METEO = 'data/raw/Histo_Meteo.xlsx'
+AUDIT = [
+    'data/audit/audit_comparaison_colonnes.csv',
+    'data/audit/audit_stats_2023.csv',
+    'data/audit/audit_stats_2024.csv',
+    'data/audit/audit_stats_2025.csv',
+    'data/audit/audit_presence_poules_groupes.csv',
+    'data/audit/audit_notations_poules.csv',
+    'data/audit/audit_notations_hors_poules.csv',
+]
+DF_1_PONTES = 'data/intermediaire/df_1_pontes.csv'
+DF_1_METEO = 'data/intermediaire/df_1_meteo.csv'
+DF_1_COMMENTAIRES = 'data/intermediaire/df_1_commentaires.csv'
+DF_1_MARANS = 'data/intermediaire/df_1_marans_individuels.csv'
+DF_2_PONTES = 'data/intermediaire/df_2_pontes.csv'
+DF_2_METEO = 'data/intermediaire/df_2_meteo.csv'
+DF_3_METEO = 'data/intermediaire/df_3_meteo.csv'
+DF_3_METEO_COMPOSANTS = 'data/intermediaire/df_3_meteo_composants.csv'
+TABLEAU_COMMENTAIRES = 'data/intermediaire/tableau_commentaires.csv'
+COMMENTAIRES_ETIQUETTES = 'data/intermediaire/commentaires_etiquettes.csv'
+COMMENTAIRES_POULES = 'data/intermediaire/commentaires_poules.csv'
+PONTES_FORMAT_FINAL = 'data/final/pontes_format_final.csv'
+PONTES_TAUX_GLISSANTS = 'data/final/pontes_taux_glissants.csv'
+PONTES_METEO = 'data/final/pontes_meteo.csv'
+PONTES_SQLITE = 'data/final/pontes.sqlite'
+CUBE_KPI = fichiers_cube()
+
+# Tables Parquet (répertoires) : ce sont elles que les étapes et les rapports relisent
+T_DF_1_PONTES = chemin_table('df_1_pontes')
+T_DF_1_METEO = chemin_table('df_1_meteo')
+T_DF_1_COMMENTAIRES = chemin_table('df_1_commentaires')
+T_DF_2_PONTES = chemin_table('df_2_pontes')
+T_DF_2_METEO = chemin_table('df_2_meteo')
+T_DF_3_METEO = chemin_table('df_3_meteo')
+T_PONTES_FORMAT_FINAL = chemin_table('pontes_format_final')
+T_PONTES_TAUX_GLISSANTS = chemin_table('pontes_taux_glissants')
+T_PONTES_METEO = chemin_table('pontes_meteo')
+
+
+def code(*scripts):
+    return [os.path.join('scripts', s) for s in scripts]
+
+
+SCRIPTS = [
+    Script('00_audit_donnees', code('00_audit_donnees.py', 'ingestion.py'), RAW_PONTES, AUDIT),
+    Script('00_gen_visu_audit', code('00_gen_visu_audit.py'), AUDIT,
+           ['output/step0_visualisation_audit.html']),
+    Script('01_normalisation_format', code('01_normalisation_format.py', '00_audit_donnees.py', 'ingestion.py', 'stockage.py'),
+           RAW_PONTES,
+           [DF_1_PONTES, DF_1_METEO, DF_1_COMMENTAIRES, DF_1_MARANS, 'data/audit/audit_autres_colonnes.csv',
+            T_DF_1_PONTES, T_DF_1_METEO, T_DF_1_COMMENTAIRES]),
+    Script('01_gen_visu_normalisation', code('01_gen_visu_normalisation.py', 'stockage.py'),
+           [T_DF_1_METEO, T_DF_1_PONTES, T_DF_1_COMMENTAIRES, DF_1_MARANS],
+           ['output/step1_visualisation_normalisation.html']),
+    Script('02_pontes_nettoyage_et_structuration', code('02_pontes_nettoyage_et_structuration.py', 'registre.py', 'stockage.py'),
+           [T_DF_1_PONTES, REGISTRE], [DF_2_PONTES, T_DF_2_PONTES]),
+    Script('02_gen_visu_pontes_nettoyage_structuration', code('02_gen_visu_pontes_nettoyage_structuration.py', 'stockage.py'),
+           [T_DF_1_PONTES, T_DF_2_PONTES], ['output/step2_visualisation_nettoyage_structuration.html']),
+    Script('03_meteo_nettoyage_valeurs_numériques', code('03_meteo_nettoyage_valeurs_numériques.py', 'ingestion.py', 'stockage.py'),
+           [T_DF_1_METEO], [DF_2_METEO, T_DF_2_METEO]),
+    Script('03_gen_visu_nettoyage_meteo', code('03_gen_visu_nettoyage_meteo.py', 'stockage.py'),
+           [T_DF_1_METEO, T_DF_2_METEO], ['output/step3_visualisation_nettoyage_meteo.html']),
+    Script('04_meteo_traitement_texte', code('04_meteo_traitement_texte.py', 'stockage.py'),
+           [T_DF_2_METEO], [DF_3_METEO, T_DF_3_METEO, DF_3_METEO_COMPOSANTS, 'data/intermediaire/texte_meteo_count.csv',
+                            'data/intermediaire/suggestions_meteo_non_classe.csv']),
+    Script('04_gen_visu_meteo_traitement_texte', code('04_gen_visu_meteo_traitement_texte.py', 'stockage.py'),
+           [T_DF_2_METEO, T_DF_3_METEO], ['output/step4_visualisation_meteo_traitement_texte.html']),
+    # analyse_detaillee_commentaires.txt est écrit en mode ajout : non suivi
+    Script('05_analyse_commentaires', code('05_analyse_commentaires.py', 'recherche_commentaires.py', 'stockage.py'),
+           [T_DF_1_COMMENTAIRES], [TABLEAU_COMMENTAIRES, COMMENTAIRES_ETIQUETTES, COMMENTAIRES_POULES, FICHIER_INDEX]),
+    Script('05_visu_analyse_commentaires', code('05_visu_analyse_commentaires.py'),
+           [TABLEAU_COMMENTAIRES, COMMENTAIRES_POULES], ['output/step5_visualisation_analyse_commentaires.html']),
+    # pontes_finale.html est aussi produit par 06_gen_visu : suivi uniquement par ce dernier
+    Script('06_pontes_format_final', code('06_pontes_format_final.py', 'stockage.py', 'matrice_pontes.py'),
+           [T_DF_2_PONTES], [PONTES_FORMAT_FINAL, T_PONTES_FORMAT_FINAL]),
+    Script('06_gen_visu_pontes_format_final', code('06_gen_visu_pontes_format_final.py', 'stockage.py'),
+           [T_PONTES_FORMAT_FINAL], ['output/pontes_finale.html']),
+    Script('06_taux_glissants', code('06_taux_glissants.py', 'stockage.py', 'matrice_pontes.py'),
+           [T_PONTES_FORMAT_FINAL], [PONTES_TAUX_GLISSANTS, T_PONTES_TAUX_GLISSANTS]),
+    Script('07_combine_all_data', code('07_combine_all_data.py', 'stockage.py', 'cube_kpi.py'),
+           [T_DF_3_METEO, T_PONTES_FORMAT_FINAL], [PONTES_METEO, T_PONTES_METEO, PONTES_SQLITE] + CUBE_KPI),
+    Script('07_gen_visu_analyse_croisee', code('07_gen_visu_analyse_croisee.py', 'stockage.py', 'cube_kpi.py'),
+           [T_PONTES_METEO] + CUBE_KPI, ['output/analyse_croisee.html']),
+    Script('08_Check_Historique_Meteo', code('08_Check_Historique_Meteo.py', 'ingestion.py', 'stockage.py'),
+           [T_DF_3_METEO, HISTO_METEO], ['output/check_meteo.html']),
+]
+
+def executer_scripts(forcer=False, rapports=True):
+    """
+    Exécute les scripts dans l'ordre du pipeline (un processus Python par script,
+    comme à la main) en sautant ceux dont le manifeste est inchangé.
+    forcer : relance tous les scripts.
+    rapports : exécute aussi les scripts de visualisation (gen_visu).
+    """
+    for script in SCRIPTS:
+        if not rapports and 'visu' in script.nom:
+            continue
+        manifeste = construire_manifeste(script.code, script.entrees)
+        if not forcer and etape_a_jour(script.nom, manifeste, script.sorties):
+            print(f"⏭️  {script.nom} : à jour, sorties en cache réutilisées")
+            continue
+        print(f"▶️  {script.nom}")
+        debut = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join('scripts', f"{script.nom}.py")], check=True)
+        enregistrer_manifeste(script.nom, manifeste, script.sorties)
+        print(f"⏱️  {script.nom} : {time.perf_counter() - debut:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exécute le pipeline Barbara (en mémoire ou par scripts).")
+    parser.add_argument('--scripts', action='store_true',
+                        help="exécute les scripts un par un, en sautant ceux dont les entrées n'ont pas changé")
+    parser.add_argument('--forcer', action='store_true', help="avec --scripts : relance tous les scripts")
+    parser.add_argument('--sans-rapports', action='store_true', help="avec --scripts : n'exécute pas les gen_visu")
+    parser.add_argument('--persister', action='store_true',
+                        help="écrit aussi les fichiers intermédiaires (data/intermediaire, data/final)")
+    parser.add_argument('--sans-audit', action='store_true', help="n'exécute pas l'étape 00")
+    parser.add_argument('--sans-verification', action='store_true', help="n'exécute pas l'étape 08")
+    parser.add_argument('--station', action='store_true',
+                        help="comble d'abord les trous météo avec les relevés horaires de la station")
+    parser.add_argument('--parallele', action='store_true',
+                        help="exécute les branches pontes, météo et commentaires en parallèle")
+    parser.add_argument('--workers', type=int, default=None, help="nombre de processus du pool")
+    args = parser.parse_args()
+
+    if args.scripts:
+        print("🚀 Démarrage du pipeline par scripts (mémoïsé)...")
+        executer_scripts(forcer=args.forcer, rapports=not args.sans_rapports)
+    else:
+        print("🚀 Démarrage du pipeline en mémoire...")
+        resultats = executer_pipeline(persister=args.persister,
+                                      audit=not args.sans_audit,
+                                      verification_meteo=not args.sans_verification,
+                                      station=args.station,
+                                      parallele=args.parallele,
+                                      max_workers=args.workers)
+        for nom, df in resultats.items():
+            print(f"  - {nom} : {len(df)} lignes")
+    print("✅ Pipeline terminé.")
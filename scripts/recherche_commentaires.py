@@ -0,0 +1,159 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import unicodedata
+import pandas as pd
+
+# ===========================================================================
+# INDEX INVERSÉ ET RECHERCHE DANS L'HISTORIQUE DES COMMENTAIRES
+# ===========================================================================
+# Chaque segment de commentaire (tableau de l'étape 05) est un document identifié
+# par une clé stable : empreinte de (Date, texte, rang du doublon dans la journée).
+# L'index associe à chaque mot (en minuscules, sans accents) la liste des clés des
+# documents qui le contiennent ; les poules citées sont indexées sous 'poule:<nom>'.
+# L'étape 05 met l'index à jour de façon incrémentale : seuls les documents
+# nouveaux sont découpés en mots, ceux qui ont disparu sont retirés et ceux dont
+# l'entrée a changé (ex: poules citées après une modification de ALIAS_POULES)
+# sont réindexés. Les dates sont conservées au format 'AAAA-MM-JJ'.
+#
+# Exemple : python scripts/recherche_commentaires.py vermifuge --dernier
+
+FICHIER_INDEX = 'data/cache/index_commentaires.json'
+VERSION_INDEX = 3
+
+
+def sans_accents(texte):
+    return ''.join(c for c in unicodedata.normalize('NFD', texte) if unicodedata.category(c) != 'Mn')
+
+
+def format_date(date):
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
+
+
+def mots(texte):
+    """
+    Découpe un texte en mots normalisés (minuscules, sans accents, 'œ' écrit 'oe').
+    """
+    return re.findall(r'\w+', sans_accents(str(texte).lower()).replace('œ', 'oe'))
+
+
+def cles_documents(df_commentaires):
+    """
+    Clé stable de chaque segment : ne dépend pas de sa position dans le tableau.
+    """
+    dates = pd.to_datetime(df_commentaires['Date']).dt.strftime('%Y-%m-%d')
+    textes = df_commentaires['Commentaires_clean'].astype(str)
+    rangs = df_commentaires.groupby([dates, textes]).cumcount().astype(str)
+    return [hashlib.sha1(f"{d}\x1f{t}\x1f{r}".encode('utf-8')).hexdigest()[:16]
+            for d, t, r in zip(dates, textes, rangs)]
+
+
+def index_vide():
+    return {'version': VERSION_INDEX, 'documents': {}, 'postings': {}}
+
+
+def charger_index(chemin=FICHIER_INDEX):
+    if not os.path.exists(chemin):
+        return index_vide()
+    with open(chemin, encoding='utf-8') as f:
+        index = json.load(f)
+    return index if index.get('version') == VERSION_INDEX else index_vide()
+
+
+def enregistrer_index(index, chemin=FICHIER_INDEX):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(chemin + '.tmp', chemin)
+
+
+def termes_document(texte, poules):
+    return set(mots(texte)) | {f'poule:{p}' for p in poules}
+
+
+def mettre_a_jour_index(df_commentaires, df_mentions, chemin=FICHIER_INDEX):
+    """
+    Met à jour l'index persistant à partir du tableau des commentaires et de la table
+    longue des poules citées (id_commentaire, poule). Retourne l'index.
+    """
+    index = charger_index(chemin)
+    documents, postings = index['documents'], index['postings']
+
+    df = df_commentaires[df_commentaires['Commentaires_clean'].notna()]
+    poules = df_mentions.groupby('id_commentaire')['poule'].agg(list)
+    actuels = {
+        cle: [format_date(date), texte, poules.get(id_c, [])]
+        for cle, date, texte, id_c in zip(cles_documents(df), df['Date'], df['Commentaires_clean'], df['id_commentaire'])
+    }
+
+    # Un document dont l'entrée a changé (poules citées...) est retiré puis réajouté
+    modifies = {cle for cle in documents.keys() & actuels.keys() if documents[cle] != actuels[cle]}
+    retires = (documents.keys() - actuels.keys()) | modifies
+    ajoutes = (actuels.keys() - documents.keys()) | modifies
+    for cle in retires:
+        _, texte, poules_doc = documents.pop(cle)
+        for terme in termes_document(texte, poules_doc):
+            postings[terme].remove(cle)
+            if not postings[terme]:
+                del postings[terme]
+    for cle in ajoutes:
+        documents[cle] = actuels[cle]
+        _, texte, poules_doc = actuels[cle]
+        for terme in termes_document(texte, poules_doc):
+            postings.setdefault(terme, []).append(cle)
+
+    if retires or ajoutes:
+        enregistrer_index(index, chemin)
+    print(f"🔎 Index des commentaires : {len(documents)} documents "
+          f"({len(ajoutes - modifies)} ajoutés, {len(retires - modifies)} retirés, {len(modifies)} réindexés)")
+    return index
+
+
+def rechercher(index, mots_cles=None, phrase=None, poule=None, debut=None, fin=None):
+    """
+    Recherche dans l'index. Tous les critères fournis doivent être satisfaits :
+    mots_cles (tous présents), phrase (mots consécutifs), poule citée,
+    date dans [debut, fin] (bornes incluses ; chaîne 'AAAA-MM-JJ' ou Timestamp).
+    Retourne un DataFrame (Date, Commentaire, Poules) trié par date décroissante.
+    """
+    documents, postings = index['documents'], index['postings']
+    termes = mots(' '.join(mots_cles or [])) + mots(phrase or '')
+    if poule:
+        termes.append(f'poule:{poule}')
+
+    if termes:
+        # Intersection en partant de la liste d'occurrences la plus courte
+        listes = sorted((postings.get(t, []) for t in set(termes)), key=len)
+        cles = set(listes[0]).intersection(*listes[1:])
+    else:
+        cles = set(documents)
+
+    if phrase:
+        sequence = ' '.join(mots(phrase))
+        cles = {c for c in cles if f' {sequence} ' in f" {' '.join(mots(documents[c][1]))} "}
+    if debut:
+        cles = {c for c in cles if documents[c][0] >= format_date(debut)}
+    if fin:
+        cles = {c for c in cles if documents[c][0] <= format_date(fin)}
+
+    resultats = pd.DataFrame([documents[c] for c in cles], columns=['Date', 'Commentaire', 'Poules'])
+    resultats['Poules'] = resultats['Poules'].str.join(', ')
+    return resultats.sort_values('Date', ascending=False, kind='mergesort').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recherche dans l'historique des commentaires.")
+    parser.add_argument('mots', nargs='*', help="mots devant tous apparaître dans le commentaire")
+    parser.add_argument('--phrase', help="suite de mots consécutifs")
+    parser.add_argument('--poule', help="poule citée dans le commentaire")
+    parser.add_argument('--depuis', help="date de début (AAAA-MM-JJ)")
+    parser.add_argument('--jusqua', help="date de fin (AAAA-MM-JJ)")
+    parser.add_argument('--dernier', action='store_true', help="n'affiche que le résultat le plus récent")
+    args = parser.parse_args()
+
+    resultats = rechercher(charger_index(), args.mots, args.phrase, args.poule, args.depuis, args.jusqua)
+    if args.dernier:
+        resultats = resultats.head(1)
+    print(resultats.to_string(index=False) if len(resultats) else "Aucun commentaire trouvé.")
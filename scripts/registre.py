@@ -0,0 +1,72 @@
+import pandas as pd
+
+# ===========================================================================
+# REGISTRE DU POULAILLER (JOURNAL DES ÉVÉNEMENTS)
+# ===========================================================================
+# Le fichier data/raw/registre_poulailler.csv liste les événements de chaque poule :
+#   Date ; Poule ; Groupe (entité suivie dans les relevés : la poule elle-même
+#   ou son groupe, ex: MARANS) ; Evenement (arrivee, depart, deces)
+# L'effectif d'une entité à une date est la somme cumulée des variations des
+# événements survenus à cette date ou avant (recherche par merge_asof sur les
+# événements triés), sans logique Python ligne à ligne.
+#
+# Effectif théorique : arrivées et départs seulement. Les décès sont détectés
+# dans les notations journalières et propagés par l'étape 02.
+# Effectif réel : arrivées, départs et décès ; l'étape 02 le compare à l'effectif
+# déduit des notations (verifier_effectif_reel).
+
+FICHIER_REGISTRE = 'data/raw/registre_poulailler.csv'
+
+VARIATIONS = {
+    'arrivee': 1,
+    'depart': -1,
+    'deces': -1,
+}
+EVENEMENTS_THEORIQUES = ('arrivee', 'depart')
+EVENEMENTS_REELS = ('arrivee', 'depart', 'deces')
+
+
+def charger_registre(chemin=FICHIER_REGISTRE):
+    """
+    Charge le journal des événements, trié par date, avec la variation d'effectif de chaque événement.
+    """
+    registre = pd.read_csv(chemin, sep=';', parse_dates=['Date'])
+    inconnus = set(registre['Evenement']) - set(VARIATIONS)
+    if inconnus:
+        raise ValueError(f"Événements inconnus dans {chemin} : {sorted(inconnus)}")
+    registre['Variation'] = registre['Evenement'].map(VARIATIONS)
+    return registre.sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+
+def variations_effectif(registre, evenements=EVENEMENTS_THEORIQUES):
+    """
+    Retourne les variations d'effectif par entité et par date (Groupe, Date, Variation).
+    """
+    ev = registre[registre['Evenement'].isin(evenements)]
+    return ev.groupby(['Groupe', 'Date'], as_index=False)['Variation'].sum()
+
+
+def cumul_variations(variations, entites, dates):
+    """
+    Pour chaque couple (entité, date), somme des variations survenues à cette date ou avant.
+    Retourne une Series alignée sur l'index de entites (0 si aucun événement).
+    """
+    ev = variations.sort_values('Date', kind='mergesort').copy()
+    ev['Date'] = ev['Date'].astype(dates.dtype)
+    ev['Cumul'] = ev.groupby('Groupe')['Variation'].cumsum()
+    # Entités en chaînes (une colonne catégorielle relue du Parquet ne se joint pas au registre)
+    requetes = pd.DataFrame({'Groupe': entites.astype(str), 'Date': dates}).reset_index()
+    requetes = requetes.sort_values('Date', kind='mergesort')
+    res = pd.merge_asof(requetes, ev[['Groupe', 'Date', 'Cumul']],
+                        on='Date', by='Groupe', direction='backward')
+    return res.set_index('index')['Cumul'].fillna(0).astype(int).reindex(entites.index)
+
+
+def effectif_a_date(registre, entites, dates, evenements=EVENEMENTS_THEORIQUES, defaut=1):
+    """
+    Effectif de chaque entité (poule ou groupe) à chaque date.
+    Une entité absente du registre compte pour defaut (poule individuelle non déclarée).
+    """
+    effectif = cumul_variations(variations_effectif(registre, evenements), entites, dates)
+    connues = entites.isin(registre['Groupe'])
+    return effectif.where(connues, defaut)
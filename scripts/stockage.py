@@ -0,0 +1,103 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# ===========================================================================
+# STOCKAGE COLONNAIRE TYPÉ (PARQUET PARTITIONNÉ PAR ANNÉE)
+# ===========================================================================
+# Les tables de pontes, de météo et de commentaires sont écrites dans
+# data/parquet/<table>/annee=AAAA/ et relues par les étapes et les rapports via
+# lire_table. Les CSV ';' sont toujours écrits à côté, comme exports lisibles
+# (et pour le classeur Tableau), mais aucun script ne les relit.
+# Les types sont fixés une fois pour toutes à l'écriture : dates en datetime64,
+# poules / états / niveaux en catégories, Ponte et Effectif en int8 (élargis
+# si les valeurs de la table ne tiennent pas, ex: totaux journaliers), Doute en
+# booléen nullable (un Doute manquant reste manquant).
+# À la lecture, seules les colonnes demandées sont lues et les filtres sont
+# poussés vers pyarrow : un filtre sur l'année n'ouvre qu'une partition, un
+# filtre sur une autre colonne utilise les statistiques des fichiers.
+#
+# Exemple : lire_table('df_2_pontes', filtres=[('annee', '==', 2025), ('group_id', '==', 'MARANS')])
+
+REPERTOIRE_PARQUET = 'data/parquet'
+COLONNE_PARTITION = 'annee'
+
+TYPES_COLONNES = {
+    'Poule_brute': 'category',
+    'Poule': 'category',
+    'Etat_oeuf': 'category',
+    'niveau_observation': 'category',
+    'group_id': 'category',
+    'Ponte': 'int8',
+    'Effectif': 'int8',
+    'Nombre_pontes': 'int16',
+    'Doute': 'boolean',
+}
+
+
+def type_entier(serie, type_col):
+    """
+    Plus petit type entier, à partir de type_col, qui contient toutes les valeurs de la série
+    (astype ne signale pas les dépassements : 200 en int8 deviendrait -56).
+    """
+    valeurs = pd.to_numeric(serie, errors='coerce')
+    for candidat in ('int8', 'int16', 'int32', 'int64'):
+        if np.iinfo(candidat).bits < np.iinfo(type_col).bits:
+            continue
+        if valeurs.isna().all() or (np.iinfo(candidat).min <= valeurs.min() and valeurs.max() <= np.iinfo(candidat).max):
+            return candidat
+    return 'int64'
+
+
+def typer_table(df):
+    """
+    Applique TYPES_COLONNES (et datetime64 pour Date) aux colonnes présentes.
+    Un type entier trop étroit pour les valeurs de la table est élargi (ex: Effectif
+    du poulailler dans pontes_meteo en int16) ; une colonne entière contenant des
+    manquants passe en entier nullable (ex: Int8).
+    """
+    df = df.copy()
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'])
+    for col, type_col in TYPES_COLONNES.items():
+        if col not in df.columns:
+            continue
+        if type_col.startswith('int'):
+            type_col = type_entier(df[col], type_col)
+            if df[col].isna().any():
+                type_col = type_col.capitalize()
+        df[col] = df[col].astype(type_col)
+    return df
+
+
+def chemin_table(nom):
+    return os.path.join(REPERTOIRE_PARQUET, nom)
+
+
+def ecrire_table(df, nom):
+    """
+    Écrit la table en Parquet partitionné par année (remplace la version précédente).
+    """
+    df = typer_table(df)
+    df[COLONNE_PARTITION] = df['Date'].dt.year
+    chemin = chemin_table(nom)
+    chemin_tmp = chemin + '.tmp'
+    shutil.rmtree(chemin_tmp, ignore_errors=True)
+    # Noms de fichiers fixes (pas d'uuid) : mêmes données, mêmes octets (mémoïsation)
+    df.to_parquet(chemin_tmp, partition_cols=[COLONNE_PARTITION], index=False,
+                  basename_template='partie-{i}.parquet')
+    shutil.rmtree(chemin, ignore_errors=True)
+    os.replace(chemin_tmp, chemin)
+
+
+def lire_table(nom, colonnes=None, filtres=None):
+    """
+    Lit une table Parquet. colonnes : liste des colonnes à lire ; filtres : liste de
+    (colonne, opérateur, valeur) combinés par ET, appliqués par pyarrow pendant la lecture.
+    La colonne de partition n'est retournée que si elle est demandée.
+    """
+    df = pd.read_parquet(chemin_table(nom), columns=colonnes, filters=filtres)
+    if COLONNE_PARTITION in df.columns and (colonnes is None or COLONNE_PARTITION not in colonnes):
+        df = df.drop(columns=COLONNE_PARTITION)
+    return df
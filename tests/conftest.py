@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules du pipeline sont des scripts du dossier scripts/ (pas un paquet)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
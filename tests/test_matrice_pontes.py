@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+from matrice_pontes import depuis_long, taux_glissants
+
+
+def matrice():
+    return depuis_long(pd.DataFrame({
+        'Date': pd.to_datetime(['2025-01-01', '2025-01-02', '2025-01-03']),
+        'Poule': ['Nina', 'Nina', 'Nina'],
+        'Ponte': [1, 0, 1],
+        'Effectif': [1, 1, 1],
+    }))
+
+
+@pytest.mark.parametrize('fenetre', [0, -1])
+def test_fenetre_invalide(fenetre):
+    with pytest.raises(ValueError, match='Fenêtre glissante invalide'):
+        taux_glissants(matrice(), fenetre)
+
+
+def test_fenetre_deux_jours():
+    par_poule, poulailler = taux_glissants(matrice(), 2)
+    assert par_poule[:, 0].tolist() == [100.0, 50.0, 50.0]
+    assert poulailler.tolist() == [100.0, 50.0, 50.0]
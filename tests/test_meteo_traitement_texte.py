@@ -0,0 +1,14 @@
+import importlib
+
+traitement_texte = importlib.import_module('04_meteo_traitement_texte')
+
+
+def test_remplacements_dictionnaire_vide():
+    remplacer = traitement_texte.compiler_remplacements({})
+    assert remplacer('beau puis bruine') == 'beau puis bruine'
+    assert remplacer('') == ''
+
+
+def test_remplacements_terme_le_plus_long():
+    remplacer = traitement_texte.compiler_remplacements({'pluie': 'PLUIE', 'fortes pluie': 'fortes pluies'})
+    assert remplacer('fortes pluie puis pluie') == 'fortes pluies puis PLUIE'
@@ -0,0 +1,33 @@
+import pandas as pd
+from recherche_commentaires import mettre_a_jour_index, rechercher
+
+
+def commentaires():
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(['2025-07-31', '2025-08-01', '2025-08-02']),
+        'Commentaires_clean': ['Nina couve', 'Nina décédée', 'Nina absente'],
+        'id_commentaire': [1, 2, 3],
+    })
+    mentions = pd.DataFrame({'id_commentaire': [1, 2, 3], 'poule': ['Nina', 'Nina', 'Nina']})
+    return df, mentions
+
+
+def test_meme_jour_en_debut_et_fin(tmp_path):
+    df, mentions = commentaires()
+    index = mettre_a_jour_index(df, mentions, chemin=str(tmp_path / 'index.json'))
+    resultats = rechercher(index, poule='Nina', debut='2025-08-01', fin='2025-08-01')
+    assert resultats['Commentaire'].tolist() == ['Nina décédée']
+    resultats = rechercher(index, poule='Nina', debut=pd.Timestamp('2025-08-01'), fin=pd.Timestamp('2025-08-01'))
+    assert resultats['Date'].tolist() == ['2025-08-01']
+
+
+def test_poules_citees_modifiees(tmp_path):
+    chemin = str(tmp_path / 'index.json')
+    df, mentions = commentaires()
+    mettre_a_jour_index(df, mentions, chemin=chemin)
+
+    # Même texte, poule citée renommée (ex: nouvel alias)
+    mentions['poule'] = 'Nina II'
+    index = mettre_a_jour_index(df, mentions, chemin=chemin)
+    assert rechercher(index, poule='Nina').empty
+    assert len(rechercher(index, poule='Nina II')) == 3
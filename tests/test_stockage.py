@@ -0,0 +1,16 @@
+import pandas as pd
+import stockage
+
+
+def test_effectif_superieur_a_127(tmp_path, monkeypatch):
+    monkeypatch.setattr(stockage, 'REPERTOIRE_PARQUET', str(tmp_path))
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(['2024-12-31', '2025-01-01']),
+        'Effectif': [200, 3],
+        'Ponte': [1, 0],
+    })
+    stockage.ecrire_table(df, 'pontes_meteo')
+    relu = stockage.lire_table('pontes_meteo').sort_values('Date').reset_index(drop=True)
+    assert relu['Effectif'].tolist() == [200, 3]
+    assert str(relu['Effectif'].dtype) == 'int16'
+    assert str(relu['Ponte'].dtype) == 'int8'